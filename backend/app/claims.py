@@ -0,0 +1,233 @@
+"""
+Claims Module
+Extracts time/location/companion claims from suspect replies as turns arrive and keeps
+an index of contradictions against the recorded timelines and between suspects
+"""
+
+import re
+import threading
+from typing import Callable, Dict, List, Optional
+
+from app.event_generator import ALL_PLAYER_COLORS, COLOR_TO_PLAYER, LOCATION_PATTERNS
+from app.timeline_qa import PlayerTimeline, TIME_PATTERN, WORD_PATTERN
+
+SENTENCE_PATTERN = re.compile(r"[^.!?\n]+")
+# "I"/"we" as the subject of the sentence; "me", "my" and "us" never are
+SELF_SUBJECT_PATTERN = re.compile(r"\b(?:i|we)\b")
+PLAYER_MENTION_PATTERN = re.compile(r"\bplayer\s*(\d+)\b|\b(" + "|".join(COLOR_TO_PLAYER) + r")\b")
+# How far a location may sit from the subject it is attributed to
+MAX_SUBJECT_GAP_WORDS = 8
+
+COMPANION_WORDS = {"with", "saw", "see", "seen", "met", "meet", "together", "alongside", "joined", "accompanied"}
+# Negated or hedged sentences are not claims we can hold the speaker to
+SKIP_WORDS = {
+    "not", "never", "no", "didn't", "wasn't", "weren't", "don't", "haven't",
+    "maybe", "might", "perhaps", "probably", "possibly", "likely", "guess", "think", "believe",
+    "suppose", "assume", "seems", "seemed", "could", "unsure",
+}
+
+
+def _player_mentions(text: str, roster: set) -> List[tuple]:
+    """(start, end, player) for every roster player named in the text"""
+    mentions = []
+    for match in PLAYER_MENTION_PATTERN.finditer(text):
+        player = f"Player{match.group(1)}" if match.group(1) else COLOR_TO_PLAYER[match.group(2)]
+        if player in roster:
+            mentions.append((match.start(), match.end(), player))
+    return mentions
+
+
+def _gap_words(text: str, start: int, end: int) -> int:
+    return len(WORD_PATTERN.findall(text[start:end]))
+
+
+def _position_subject(text: str, location_start: int, speaker: str, self_subject, mentions: List[tuple]) -> Optional[str]:
+    """
+    Who the sentence places at the location: the nearest subject before it, "I"/"we" or a named player.
+    "At time 3 I was in Admin" -> speaker, "I saw blue in Admin at time 3" -> blue,
+    "I was with blue in Admin at time 3" -> speaker.
+    """
+    # "with blue in Admin" names a companion, not the subject
+    candidates = [
+        (end, player) for start, end, player in mentions
+        if end <= location_start and player != speaker and not text[:start].endswith("with ")
+    ]
+    if self_subject and self_subject.end() <= location_start:
+        candidates.append((self_subject.end(), speaker))
+    if not candidates:
+        return None
+    end, subject = max(candidates)
+    if _gap_words(text, end, location_start) > MAX_SUBJECT_GAP_WORDS:
+        return None
+    return subject
+
+
+def extract_claims(speaker: str, reply: str, roster: set) -> List[Dict]:
+    """
+    Pull claims out of a reply, one sentence at a time. A claim needs an explicit time:
+        position   subject was at a location ("At time 3 I was in Admin", "Blue was in Admin at time 3")
+        together   speaker was with another player ("I was with Player2 at time 3")
+    """
+    claims = []
+    for match in SENTENCE_PATTERN.finditer(reply):
+        sentence = match.group().strip()
+        text = sentence.lower()
+        words = set(WORD_PATTERN.findall(text))
+        if not words or words & SKIP_WORDS:
+            continue
+        times = list(dict.fromkeys(int(t) for t in TIME_PATTERN.findall(text)))
+        if not times:
+            continue
+
+        locations = []
+        for location, pattern in LOCATION_PATTERNS:
+            found = pattern.search(text)
+            if found:
+                locations.append((found.start(), location))
+        mentions = _player_mentions(text, roster)
+        others = list(dict.fromkeys(player for _, _, player in mentions if player != speaker))
+        self_subject = SELF_SUBJECT_PATTERN.search(text)
+
+        subject = None
+        if len(locations) == 1:
+            location_start, location = locations[0]
+            subject = _position_subject(text, location_start, speaker, self_subject, mentions)
+
+        for time in times:
+            if subject:
+                claims.append({"subject": subject, "time": time, "location": location, "quote": sentence})
+            if self_subject and words & COMPANION_WORDS:
+                for player in others:
+                    claims.append({"subject": speaker, "time": time, "with": player, "quote": sentence})
+    return claims
+
+
+def _color(player_name: str) -> str:
+    return ALL_PLAYER_COLORS.get(player_name, player_name)
+
+
+class ClaimIndex:
+    """
+    Per-game claim store keyed by (player, time), so checking a new claim only touches
+    the claims already made about the same player at the same time.
+    """
+
+    def __init__(self, roster: List[str], timeline_for: Callable[[str], PlayerTimeline]):
+        self.roster = set(roster)
+        self.timeline_for = timeline_for
+        self.claims: List[Dict] = []
+        self.positions: Dict[tuple, Dict[str, List[Dict]]] = {}
+        self.together: Dict[tuple, Dict[str, List[Dict]]] = {}
+        self.contradictions: List[Dict] = []
+        self._claim_keys = set()
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def add_reply(self, speaker: str, reply: str) -> List[Dict]:
+        """Index the claims in one reply; returns the contradictions they introduced"""
+        new = []
+        with self._lock:
+            for claim in extract_claims(speaker, reply, self.roster):
+                # A repeated statement adds nothing, and skipping it keeps each (player, time) slot small
+                key = (speaker, claim["subject"], claim["time"], claim.get("location"), claim.get("with"))
+                if key in self._claim_keys:
+                    continue
+                self._claim_keys.add(key)
+                claim = {"id": len(self.claims) + 1, "speaker": _color(speaker), **claim}
+                self.claims.append(claim)
+                if "location" in claim:
+                    new += self._check_position(claim)
+                    self.positions.setdefault((claim["subject"], claim["time"]), {}).setdefault(
+                        claim["location"], []).append(claim)
+                else:
+                    new += self._check_together(claim)
+                    for a, b in ((claim["subject"], claim["with"]), (claim["with"], claim["subject"])):
+                        self.together.setdefault((a, claim["time"]), {}).setdefault(b, []).append(claim)
+            self.contradictions += new
+        return new
+
+    def _record(self, kind: str, claims: List[Dict], detail: str, recorded: Optional[List[str]] = None) -> List[Dict]:
+        key = (kind, tuple(sorted(claim["id"] for claim in claims)))
+        if key in self._seen:
+            return []
+        self._seen.add(key)
+        suspects = {claim["speaker"] for claim in claims}
+        suspects |= {_color(claim["subject"]) for claim in claims}
+        suspects |= {_color(claim["with"]) for claim in claims if "with" in claim}
+        contradiction = {
+            "id": len(self._seen),
+            "kind": kind,
+            "time": claims[0]["time"],
+            "suspects": sorted(suspects),
+            "detail": detail,
+            "claims": claims,
+        }
+        if recorded is not None:
+            contradiction["recorded"] = recorded
+        return [contradiction]
+
+    def _check_position(self, claim: Dict) -> List[Dict]:
+        subject, time, location = claim["subject"], claim["time"], claim["location"]
+        found = []
+
+        recorded = self.timeline_for(subject).locations_by_time.get(time)
+        if recorded and location not in recorded:
+            found += self._record(
+                "timeline", [claim],
+                f"{claim['speaker']} places {_color(subject)} in {location} at time {time}, "
+                f"but the recorded timeline has {', '.join(recorded)}",
+                recorded
+            )
+
+        for other_location, others in self.positions.get((subject, time), {}).items():
+            if other_location == location:
+                continue
+            for other in others:
+                kind = "self" if other["speaker"] == claim["speaker"] else "cross"
+                found += self._record(
+                    kind, [other, claim],
+                    f"{_color(subject)} placed in both {other_location} and {location} at time {time}"
+                )
+
+        # Someone said they were with the subject at this time, but is placed somewhere else
+        for companion, links in self.together.get((subject, time), {}).items():
+            for companion_location, others in self.positions.get((companion, time), {}).items():
+                if companion_location == location:
+                    continue
+                for other in others:
+                    found += self._record(
+                        "cross", [links[0], other, claim],
+                        f"{_color(subject)} and {_color(companion)} were together at time {time}, "
+                        f"but are placed in {location} and {companion_location}"
+                    )
+        return found
+
+    def _check_together(self, claim: Dict) -> List[Dict]:
+        subject, time, companion = claim["subject"], claim["time"], claim["with"]
+        found = []
+
+        timeline = self.timeline_for(subject)
+        if time in timeline.by_time and companion not in timeline.companions_by_time.get(time, []):
+            recorded = timeline.companions_by_time.get(time, [])
+            found += self._record(
+                "timeline", [claim],
+                f"{_color(subject)} claims to have been with {_color(companion)} at time {time}, "
+                f"but the recorded timeline has " + (", ".join(_color(p) for p in recorded) or "nobody"),
+                [_color(p) for p in recorded]
+            )
+
+        for subject_location, subject_claims in self.positions.get((subject, time), {}).items():
+            for companion_location, companion_claims in self.positions.get((companion, time), {}).items():
+                if subject_location == companion_location:
+                    continue
+                found += self._record(
+                    "cross", [claim, subject_claims[0], companion_claims[0]],
+                    f"{_color(subject)} and {_color(companion)} were together at time {time}, "
+                    f"but are placed in {subject_location} and {companion_location}"
+                )
+        return found
+
+    def report(self, color: Optional[str] = None) -> Dict:
+        with self._lock:
+            contradictions = [c for c in self.contradictions if color is None or color in c["suspects"]]
+            return {"claims": len(self.claims), "contradictions": contradictions}
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -25,8 +25,48 @@ def get_db():
     finally:
         db.close()
 
-def init_db():
-    """Initialize database tables"""
-    from app.models import GameSession, ChatMessage
-    Base.metadata.create_all(bind=engine)
+def init_db() -> bool:
+    """
+    Initialize database tables.
+    Skipped when SKIP_SCHEMA_CREATE is set (DB is migrated out of band) or every table already exists.
+    Returns True if any table, column or index was created.
+    """
+    if os.getenv("SKIP_SCHEMA_CREATE", "").lower() in ("1", "true", "yes"):
+        return False
+    
+    from app.models import GameSession, ChatMessage, LLMUsage, RetentionState
+    inspector = inspect(engine)
+    existing = set(inspector.get_table_names())
+    created = False
+    if not set(Base.metadata.tables).issubset(existing):
+        Base.metadata.create_all(bind=engine)
+        created = True
+    
+    # create_all skips tables that already exist, so add nullable columns and indexes introduced since
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns and column.nullable:
+                column_type = column.type.compile(dialect=engine.dialect)
+                with engine.begin() as conn:
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+                created = True
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind=engine)
+                created = True
+    return created
+
+def check_db_ready() -> bool:
+    """Readiness probe: the database answers a trivial query"""
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return True
+    except Exception as e:
+        print(f"[DATABASE] Readiness check failed: {e}")
+        return False
 
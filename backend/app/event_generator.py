@@ -4,21 +4,81 @@ Generates game events through iterative LLM calls and assigns impostor
 """
 
 import json
-from typing import Dict, List, Optional
-from openai import OpenAI
+import os
+import re
+import threading
+from typing import Callable, Dict, List, Optional
 
-# Player color mapping
-PLAYER_COLORS = {
-    "Player1": "red",
-    "Player2": "yellow", 
-    "Player3": "blue",
-    "Player4": "green"
-}
+from app.usage import usage_ledger
 
-COLOR_TO_PLAYER = {v: k for k, v in PLAYER_COLORS.items()}
+MIN_PLAYERS = 4
+MAX_PLAYERS = 15
+
+# PlayerN always gets the Nth colour, so the mapping is the same whatever the game size
+ALL_COLORS = [
+    "red", "yellow", "blue", "green", "orange", "purple", "pink", "cyan",
+    "lime", "brown", "white", "black", "maroon", "rose", "tan"
+]
+
+ALL_PLAYER_COLORS = {f"Player{i + 1}": color for i, color in enumerate(ALL_COLORS)}
+
+# Player color mapping for the default four-player game
+PLAYER_COLORS = {name: ALL_PLAYER_COLORS[name] for name in ["Player1", "Player2", "Player3", "Player4"]}
+
+COLOR_TO_PLAYER = {v: k for k, v in ALL_PLAYER_COLORS.items()}
+
+# Only the most recent periods are sent back as context, so prompt size stays flat as the game grows
+EVENT_CONTEXT_PERIODS = int(os.getenv("EVENT_CONTEXT_PERIODS", "3"))
+
+
+def player_colors(num_players: int) -> Dict[str, str]:
+    """Player name to colour mapping for a game of num_players"""
+    if not MIN_PLAYERS <= num_players <= MAX_PLAYERS:
+        raise ValueError(f"Games need between {MIN_PLAYERS} and {MAX_PLAYERS} players")
+    return {f"Player{i + 1}": ALL_COLORS[i] for i in range(num_players)}
+
+
+def max_impostors(num_players: int) -> int:
+    """At least two crewmates per impostor"""
+    return max(1, (num_players - 1) // 3)
+
+# Ship locations named in the generation prompt
+SHIP_LOCATIONS = [
+    "Cafeteria", "Admin", "Storage", "Electrical", "Lower Engine", "Upper Engine", "Security",
+    "Reactor", "MedBay", "O2", "Weapons", "Shields", "Communications", "Navigation"
+]
+LOCATION_PATTERNS = [(location, re.compile(r"\b" + re.escape(location) + r"\b", re.IGNORECASE)) for location in SHIP_LOCATIONS]
+
+def find_locations(text: str) -> List[str]:
+    """Every ship location named as a whole word, in the order they appear"""
+    if not text:
+        return []
+    found = []
+    for location, pattern in LOCATION_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            found.append((match.start(), location))
+    return [location for _, location in sorted(found)]
+
+def build_player_events(all_events: List[Dict], roster: List[str]) -> Dict[str, List[Dict]]:
+    """Per-player event lists in a single pass over all_events; players share each event entry"""
+    player_data = {player_name: [] for player_name in roster}
+    for time_period in all_events:
+        time = time_period.get("time", 0)
+        for event in time_period.get("events", []):
+            entry = {
+                "time": time,
+                "event_id": event.get("event_id"),
+                "description": event.get("description"),
+                "players": event.get("players")
+            }
+            for player_name in dict.fromkeys(event.get("players") or []):
+                if player_name in player_data:
+                    player_data[player_name].append(entry)
+    return player_data
 
 EVENT_GENERATION_PROMPT = """You are generating events for an Among Us-style game. 
-There are 4 players: Player1, Player2, Player3, and Player4.
+There are {num_players} players: {player_list}.
 The game takes place on a spaceship with these locations: Cafeteria, Admin, Storage, Electrical, 
 Lower Engine, Upper Engine, Security, Reactor, MedBay, O2, Weapons, Shields, Communications, Navigation.
 
@@ -27,11 +87,11 @@ Rules:
 - Players should move between adjacent locations realistically
 - Include tasks being completed, players crossing paths, meetings, etc.
 - Make events interesting and varied
-- Each time period should have 2-4 events
+- Each time period should have {min_events}-{max_events} events
 
 Generate events for time period {time_index}. 
 
-Previous events (for context and continuity):
+Most recent previous events (for context and continuity):
 {previous_events}
 
 Output ONLY valid JSON in this exact format with no additional text:
@@ -47,66 +107,101 @@ Output ONLY valid JSON in this exact format with no additional text:
 }}
 """
 
-IMPOSTOR_ASSIGNMENT_PROMPT = """Based on the following event history from an Among Us game, select ONE player to be the Impostor.
-Consider which player had opportunities to be alone, was in isolated areas, or could have committed a kill.
+IMPOSTOR_ASSIGNMENT_PROMPT = """Based on the following event history summary from an Among Us game, select {num_impostors} player(s) to be the Impostor(s).
+Consider which players had opportunities to be alone, were in isolated areas, or could have committed a kill.
 
-Event History:
+Each line lists one player's events as time:location ("?" if no location was named); * marks events where that player was alone.
 {event_history}
 
-You must select exactly one impostor from: Player1, Player2, Player3, Player4.
+You must select exactly {num_impostors} different impostor(s) from: {player_list}.
 
-Also, create a brief "murder event" that happened during the game - describe when and where the impostor 
-killed a victim (you can make the victim a 5th NPC crew member who was found dead).
+Also, for each impostor create a brief "murder event" that happened during the game - describe when and where that impostor 
+killed a victim (the victims are NPC crew members who were found dead: {victims}).
 
 Output ONLY valid JSON in this exact format:
 {{
-  "impostor": "<Player name>",
-  "murder_event": {{
-    "time": <time_period when murder occurred>,
-    "location": "<where it happened>",
-    "victim": "Crewmate5",
-    "description": "<brief description of the murder>",
-    "witnesses": ["<any players who might have seen something suspicious>"]
-  }}
+  "impostors": ["<Player name>"],
+  "murder_events": [
+    {{
+      "impostor": "<Player name>",
+      "time": <time_period when murder occurred>,
+      "location": "<where it happened>",
+      "victim": "<victim name>",
+      "description": "<brief description of the murder>",
+      "witnesses": ["<any players who might have seen something suspicious>"]
+    }}
+  ]
 }}
 """
 
 
+class GenerationCancelled(Exception):
+    """Raised when game generation is abandoned part way through"""
+
+
+def _parse_json_response(response_text: str):
+    """Parse JSON from an LLM reply, tolerating a markdown code fence"""
+    response_text = response_text.strip()
+    if response_text.startswith("```"):
+        response_text = response_text.split("```")[1]
+        if response_text.startswith("json"):
+            response_text = response_text[4:]
+    if response_text.endswith("```"):
+        response_text = response_text[:-3]
+    return json.loads(response_text.strip())
+
+
 class EventGenerator:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, num_players: int = 4, num_impostors: int = 1, game_id: Optional[str] = None):
+        # openai is slow to import, so it is only loaded once a game is generated
+        from openai import OpenAI
+        self.api_key = api_key
+        self.game_id = game_id
         self.client = OpenAI(api_key=api_key)
         self.model = "gpt-4.1"
+        self.players = player_colors(num_players)
+        self.roster = list(self.players.keys())
+        if not 1 <= num_impostors <= max_impostors(num_players):
+            raise ValueError(f"A {num_players}-player game supports 1 to {max_impostors(num_players)} impostors")
+        self.num_impostors = num_impostors
+        # Event count per period grows with the crew so everyone keeps appearing
+        self.min_events = max(2, num_players // 2)
+        self.max_events = max(4, num_players)
     
     def generate_single_time_period(self, time_index: int, previous_events: List[Dict]) -> Dict:
         """Generate events for a single time period"""
-        previous_events_str = json.dumps(previous_events, indent=2) if previous_events else "None (this is the first time period)"
+        recent_events = previous_events[-EVENT_CONTEXT_PERIODS:]
+        previous_events_str = (
+            json.dumps(recent_events, separators=(",", ":")) if recent_events
+            else "None (this is the first time period)"
+        )
         
         prompt = EVENT_GENERATION_PROMPT.format(
+            num_players=len(self.roster),
+            player_list=", ".join(self.roster),
+            min_events=self.min_events,
+            max_events=self.max_events,
             time_index=time_index,
             previous_events=previous_events_str
         )
+        # BudgetExceeded propagates: fallback events would leave a game nobody can play
+        plan = usage_ledger.plan(
+            self.api_key, self.game_id, self.model, max_tokens=max(1000, 100 * self.max_events), shrink_output=False
+        )
         
         try:
             response = self.client.chat.completions.create(
-                model=self.model,
+                model=plan["model"],
                 messages=[
                     {"role": "system", "content": "You are a game event generator. Output only valid JSON."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.8,
-                max_tokens=1000
+                max_tokens=plan["max_tokens"]
             )
+            usage_ledger.record(self.api_key, self.game_id, None, "events", plan["model"], response.usage)
             
-            response_text = response.choices[0].message.content.strip()
-            # Clean up potential markdown code blocks
-            if response_text.startswith("```"):
-                response_text = response_text.split("```")[1]
-                if response_text.startswith("json"):
-                    response_text = response_text[4:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-            
-            return json.loads(response_text.strip())
+            return _parse_json_response(response.choices[0].message.content)
         except Exception as e:
             print(f"[EVENT_GENERATOR] Error generating events for time {time_index}: {e}")
             # Return a fallback event
@@ -116,120 +211,175 @@ class EventGenerator:
                     {
                         "event_id": time_index * 10 + 1,
                         "description": f"Players continue their tasks around the ship at time {time_index}.",
-                        "players": ["Player1", "Player2", "Player3", "Player4"]
+                        "players": list(self.roster)
                     }
                 ]
             }
     
-    def generate_all_events(self, num_periods: int = 10) -> List[Dict]:
+    def generate_all_events(
+        self,
+        num_periods: int = 10,
+        cancel_event: Optional[threading.Event] = None,
+        progress_callback: Optional[Callable[..., None]] = None
+    ) -> List[Dict]:
         """Generate events for all time periods iteratively"""
         all_events = []
         
         for time_index in range(num_periods):
+            if cancel_event is not None and cancel_event.is_set():
+                raise GenerationCancelled(f"Cancelled before time period {time_index}")
             print(f"[EVENT_GENERATOR] Generating events for time period {time_index}...")
             time_period_events = self.generate_single_time_period(time_index, all_events)
             all_events.append(time_period_events)
+            if progress_callback:
+                progress_callback("period", time_index=time_index, num_periods=num_periods)
         
         return all_events
     
     def assign_impostor(self, all_events: List[Dict]) -> Dict:
-        """Use LLM to assign the impostor based on event history"""
-        event_history_str = json.dumps(all_events, indent=2)
+        """
+        Use LLM to assign the impostor(s) based on event history.
+        Returns {"impostor", "murder_event"} for the first impostor plus {"impostors", "murder_events"} for all.
+        """
+        event_history_str = self.summarize_for_assignment(all_events)
+        victims = [f"Crewmate{len(self.roster) + i + 1}" for i in range(self.num_impostors)]
         
-        prompt = IMPOSTOR_ASSIGNMENT_PROMPT.format(event_history=event_history_str)
+        prompt = IMPOSTOR_ASSIGNMENT_PROMPT.format(
+            num_impostors=self.num_impostors,
+            event_history=event_history_str,
+            player_list=", ".join(self.roster),
+            victims=", ".join(victims)
+        )
+        # BudgetExceeded propagates rather than falling back to a predictable impostor
+        plan = usage_ledger.plan(
+            self.api_key, self.game_id, self.model, max_tokens=500 * self.num_impostors, shrink_output=False
+        )
         
         try:
             response = self.client.chat.completions.create(
-                model=self.model,
+                model=plan["model"],
                 messages=[
                     {"role": "system", "content": "You are assigning the impostor role. Output only valid JSON."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
-                max_tokens=500
+                max_tokens=plan["max_tokens"]
             )
+            usage_ledger.record(self.api_key, self.game_id, None, "impostor", plan["model"], response.usage)
             
-            response_text = response.choices[0].message.content.strip()
-            # Clean up potential markdown code blocks
-            if response_text.startswith("```"):
-                response_text = response_text.split("```")[1]
-                if response_text.startswith("json"):
-                    response_text = response_text[4:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-            
-            return json.loads(response_text.strip())
+            return self._normalize_impostor_data(_parse_json_response(response.choices[0].message.content), victims)
         except Exception as e:
             print(f"[EVENT_GENERATOR] Error assigning impostor: {e}")
-            # Fallback to Player1
-            return {
-                "impostor": "Player1",
-                "murder_event": {
-                    "time": 5,
-                    "location": "Electrical",
-                    "victim": "Crewmate5",
-                    "description": "Player1 eliminated Crewmate5 in Electrical while no one was watching.",
-                    "witnesses": []
-                }
-            }
+            # Fallback to the first players
+            return self._normalize_impostor_data({}, victims)
     
-    def get_player_events(self, all_events: List[Dict], player_name: str) -> List[Dict]:
-        """Extract events that a specific player was involved in"""
-        player_events = []
-        
+    def summarize_for_assignment(self, all_events: List[Dict]) -> str:
+        """Times, locations and solo events per player; a fraction of the size of the full event JSON"""
+        lines = {player_name: [] for player_name in self.roster}
         for time_period in all_events:
             time = time_period.get("time", 0)
             for event in time_period.get("events", []):
-                if player_name in event.get("players", []):
-                    player_events.append({
-                        "time": time,
-                        "event_id": event.get("event_id"),
-                        "description": event.get("description"),
-                        "players": event.get("players")
-                    })
-        
-        return player_events
+                names = [name for name in dict.fromkeys(event.get("players") or []) if name in lines]
+                location = "/".join(find_locations(event.get("description") or "")) or "?"
+                alone = "*" if len(names) == 1 else ""
+                for name in names:
+                    lines[name].append(f"{time}:{location}{alone}")
+        return "\n".join(f"{name}: {' '.join(items) or 'no recorded events'}" for name, items in lines.items())
     
-    def build_player_event_data(self, all_events: List[Dict]) -> Dict[str, List[Dict]]:
-        """Build event data for all players"""
-        player_data = {}
+    def _normalize_impostor_data(self, data: Dict, victims: List[str]) -> Dict:
+        """Accept the single-impostor shape too, drop unknown players and top up to num_impostors"""
+        impostors = data.get("impostors") or ([data["impostor"]] if data.get("impostor") else [])
+        murder_events = data.get("murder_events") or ([data["murder_event"]] if data.get("murder_event") else [])
         
-        for player_name in PLAYER_COLORS.keys():
-            player_data[player_name] = self.get_player_events(all_events, player_name)
+        impostors = [p for p in dict.fromkeys(impostors) if p in self.players][:self.num_impostors]
+        for player_name in self.roster:
+            if len(impostors) >= self.num_impostors:
+                break
+            if player_name not in impostors:
+                impostors.append(player_name)
         
-        return player_data
-
+        murders_by_impostor = {}
+        for i, murder in enumerate(murder_events):
+            owner = murder.get("impostor") or (impostors[i] if i < len(impostors) else None)
+            murders_by_impostor.setdefault(owner, murder)
+        
+        normalized = []
+        for i, impostor in enumerate(impostors):
+            murder = dict(murders_by_impostor.get(impostor) or {
+                "time": 5,
+                "location": "Electrical",
+                "victim": victims[i],
+                "description": f"{impostor} eliminated {victims[i]} in Electrical while no one was watching.",
+                "witnesses": []
+            })
+            murder["impostor"] = impostor
+            murder["witnesses"] = [w for w in murder.get("witnesses") or [] if w in self.players and w != impostor]
+            normalized.append(murder)
+        
+        return {
+            "impostor": impostors[0],
+            "murder_event": normalized[0],
+            "impostors": impostors,
+            "murder_events": normalized
+        }
+    
+    def build_player_event_data(self, all_events: List[Dict]) -> Dict[str, List[Dict]]:
+        return build_player_events(all_events, self.roster)
 
-def generate_game_data(api_key: str, num_periods: int = 10) -> Dict:
+def generate_game_data(
+    api_key: str,
+    num_periods: int = 10,
+    cancel_event: Optional[threading.Event] = None,
+    progress_callback: Optional[Callable[..., None]] = None,
+    num_players: int = 4,
+    num_impostors: int = 1,
+    game_id: Optional[str] = None
+) -> Dict:
     """
-    Main function to generate complete game data
+    Main function to generate complete game data.
+    Setting cancel_event stops generation between LLM calls with GenerationCancelled.
+    Token usage is charged to game_id in the usage ledger.
+    progress_callback(stage, **details) is called from the generating thread with stages:
+        "period"            time_index, num_periods
+        "impostor_assigned" impostor_data, impostor_colors
+        "player_ready"      player_name, events  (that player's events and the murders are final)
     Returns: {
         "all_events": [...],
         "player_events": {"Player1": [...], ...},
-        "impostor_data": {"impostor": "...", "murder_event": {...}},
-        "impostor_color": "red/yellow/blue/green"
+        "impostor_data": {"impostor": "...", "murder_event": {...}, "impostors": [...], "murder_events": [...]},
+        "impostor_color": "red/yellow/blue/green/...",
+        "impostor_colors": [...],
+        "players": {"Player1": "red", ...}
     }
     """
-    generator = EventGenerator(api_key)
+    generator = EventGenerator(api_key, num_players, num_impostors, game_id)
     
     # Generate all events
     print("[GAME_DATA] Generating event history...")
-    all_events = generator.generate_all_events(num_periods)
-    
-    # Build per-player event data
-    print("[GAME_DATA] Building player event data...")
-    player_events = generator.build_player_event_data(all_events)
+    all_events = generator.generate_all_events(num_periods, cancel_event, progress_callback)
     
     # Assign impostor
+    if cancel_event is not None and cancel_event.is_set():
+        raise GenerationCancelled("Cancelled before impostor assignment")
     print("[GAME_DATA] Assigning impostor...")
     impostor_data = generator.assign_impostor(all_events)
     
-    impostor_player = impostor_data.get("impostor", "Player1")
-    impostor_color = PLAYER_COLORS.get(impostor_player, "red")
+    impostor_colors = [generator.players[p] for p in impostor_data["impostors"]]
+    if progress_callback:
+        progress_callback("impostor_assigned", impostor_data=impostor_data, impostor_colors=impostor_colors)
+    
+    # Build per-player event data
+    print("[GAME_DATA] Building player event data...")
+    player_events = generator.build_player_event_data(all_events)
+    if progress_callback:
+        for player_name, events in player_events.items():
+            progress_callback("player_ready", player_name=player_name, events=events)
     
     return {
         "all_events": all_events,
         "player_events": player_events,
         "impostor_data": impostor_data,
-        "impostor_color": impostor_color
-    }
\ No newline at end of file
+        "impostor_color": impostor_colors[0],
+        "impostor_colors": impostor_colors,
+        "players": generator.players
+    }
@@ -0,0 +1,142 @@
+"""
+Event Index Module
+Ranks a suspect's events by relevance to the current question so long timelines
+do not have to be pasted whole into every system prompt
+"""
+
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+from app.event_generator import COLOR_TO_PLAYER
+from app.timeline_qa import TIME_PATTERN
+
+# Timelines up to this many events are sent in full, as before
+EVENT_INDEX_MIN_EVENTS = int(os.getenv("EVENT_INDEX_MIN_EVENTS", "40"))
+EVENT_INDEX_TOP_K = int(os.getenv("EVENT_INDEX_TOP_K", "12"))
+EVENT_TOKEN_BUDGET = int(os.getenv("EVENT_TOKEN_BUDGET", "800"))
+# Events this close to the murder time are always included
+MURDER_WINDOW = 1
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+TIME_MATCH_BOOST = 5.0
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "the", "a", "an", "and", "or", "to", "of", "in", "on", "at", "for", "with", "was", "were",
+    "is", "are", "you", "your", "i", "me", "my", "did", "do", "what", "where", "when", "who",
+    "while", "then", "that", "this", "it", "they", "their", "there", "time",
+}
+
+
+def _tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English)"""
+    return len(text) // 4 + 1
+
+
+class EventIndex:
+    """BM25 index over one suspect's events, built once per game"""
+
+    def __init__(self, events: List[Dict]):
+        self.events = events
+        self.postings: Dict[str, List[tuple]] = {}
+        self.by_time: Dict[int, List[int]] = {}
+        doc_lengths = []
+
+        for i, event in enumerate(events):
+            text = " ".join([event.get("description") or ""] + list(event.get("players") or []))
+            tokens = Counter(_tokenize(text))
+            doc_lengths.append(sum(tokens.values()))
+            for term, tf in tokens.items():
+                self.postings.setdefault(term, []).append((i, tf))
+            if isinstance(event.get("time"), int):
+                self.by_time.setdefault(event["time"], []).append(i)
+
+        n = len(events)
+        avg_length = (sum(doc_lengths) / n) if n else 0.0
+        self.norms = [K1 * (1 - B + B * length / avg_length) if avg_length else K1 for length in doc_lengths]
+        self.idf = {
+            term: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+        self.event_tokens = [estimate_tokens(event.get("description") or "") + 8 for event in events]
+
+    def _query_terms(self, question: str) -> List[str]:
+        terms = _tokenize(question)
+        # Colours are how the player refers to suspects; events use player names
+        return terms + [COLOR_TO_PLAYER[t].lower() for t in terms if t in COLOR_TO_PLAYER]
+
+    def score(self, question: str) -> Dict[int, float]:
+        """BM25 scores for events matching the question, with a boost for events at a mentioned time"""
+        scores: Dict[int, float] = {}
+        for term in set(self._query_terms(question)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self.postings[term]:
+                scores[i] = scores.get(i, 0.0) + idf * tf * (K1 + 1) / (tf + self.norms[i])
+        for t in TIME_PATTERN.findall(question.lower()):
+            for i in self.by_time.get(int(t), []):
+                scores[i] = scores.get(i, 0.0) + TIME_MATCH_BOOST
+        return scores
+
+    def select(
+        self,
+        question: str,
+        murder_time: Optional[int] = None,
+        top_k: int = EVENT_INDEX_TOP_K,
+        token_budget: int = EVENT_TOKEN_BUDGET
+    ) -> List[Dict]:
+        """
+        Pick the murder-window events plus the top-k events for the question, within the token budget.
+        Returned in timeline order.
+        """
+        chosen = set()
+        used = 0
+
+        def take(i: int) -> bool:
+            nonlocal used
+            if i in chosen or used + self.event_tokens[i] > token_budget:
+                return False
+            chosen.add(i)
+            used += self.event_tokens[i]
+            return True
+
+        try:
+            murder_time = int(murder_time)
+        except (TypeError, ValueError):
+            murder_time = None
+        if murder_time is not None:
+            for t in range(murder_time - MURDER_WINDOW, murder_time + MURDER_WINDOW + 1):
+                for i in self.by_time.get(t, []):
+                    take(i)
+
+        scores = self.score(question)
+        ranked = sorted(scores, key=lambda i: -scores[i])
+        taken = 0
+        for i in ranked:
+            if taken >= top_k:
+                break
+            if take(i):
+                taken += 1
+
+        return [self.events[i] for i in sorted(chosen)]
+
+
+def select_relevant_events(
+    index: EventIndex,
+    question: str,
+    murder_time: Optional[int] = None
+) -> List[Dict]:
+    """Full timeline for short games, ranked excerpt once it grows past EVENT_INDEX_MIN_EVENTS"""
+    if len(index.events) <= EVENT_INDEX_MIN_EVENTS:
+        return index.events
+    return index.select(question, murder_time)
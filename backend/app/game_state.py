@@ -1,14 +1,15 @@
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from sqlalchemy.orm import Session
 from app.models import GameSession, ChatMessage
 import uuid
 
-def create_game_session(db: Session, scenario: str) -> GameSession:
+def create_game_session(db: Session, scenario: str, game_id: Optional[str] = None) -> GameSession:
     """Create a new game session"""
     session_id = str(uuid.uuid4())
     
     game_session = GameSession(
         session_id=session_id,
+        game_id=game_id,
         scenario=scenario,
         health=100,
         coins=0
@@ -80,6 +81,37 @@ def get_chat_messages(db: Session, session_id: str) -> list:
         for msg in messages
     ]
 
+def get_chat_messages_page(
+    db: Session,
+    session_id: str,
+    after_id: Optional[int] = None,
+    limit: int = 50
+) -> Tuple[list, bool]:
+    """
+    Get one page of chat messages using keyset pagination on ChatMessage.id.
+    Returns (messages, has_more); pass the last message's id as after_id for the next page.
+    """
+    game_session = get_game_session(db, session_id)
+    if not game_session:
+        return [], False
+    
+    query = db.query(ChatMessage).filter(ChatMessage.session_id == game_session.id)
+    if after_id is not None:
+        query = query.filter(ChatMessage.id > after_id)
+    # Fetch one extra row to learn whether another page exists
+    messages = query.order_by(ChatMessage.id.asc()).limit(limit + 1).all()
+    
+    has_more = len(messages) > limit
+    return [
+        {
+            "id": msg.id,
+            "role": msg.role,
+            "content": msg.content,
+            "timestamp": msg.timestamp.isoformat() if msg.timestamp else None
+        }
+        for msg in messages[:limit]
+    ], has_more
+
 def get_summary_message(db: Session, session_id: str) -> Optional[str]:
     """Get the compressed summary message if it exists"""
     game_session = get_game_session(db, session_id)
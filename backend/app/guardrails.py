@@ -3,11 +3,26 @@ Output Guardrails Module
 Uses Ollama Llama 3 to detect if an AI suspect is confessing to being the impostor
 """
 
-import requests
+import os
 import random
-from typing import Tuple
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
 
-OLLAMA_BASE_URL = "http://localhost:11434"
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+OLLAMA_MODEL = "llama3"
+# How long Ollama keeps llama3 loaded after a request (Ollama duration string, or -1 for forever)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_TIMEOUT = 1000
+OLLAMA_POOL_SIZE = 16
+
+# When enabled, replies that arrive while a judge request is in flight are scored together in one request
+GUARDRAIL_BATCHING = os.getenv("GUARDRAIL_BATCHING", "").lower() in ("1", "true", "yes")
+GUARDRAIL_MAX_BATCH = int(os.getenv("GUARDRAIL_MAX_BATCH", "8"))
+
+# A request whose model load took longer than this counts as a cold call
+COLD_LOAD_THRESHOLD_MS = 250
 
 CONFESSION_DETECTION_PROMPT = """You are a moderation assistant for an Among Us-style game. Your role is to detect if an AI suspect is admitting or confessing to being the impostor.
 
@@ -44,6 +59,26 @@ Do NOT flag:
 
 Return ONLY a single number from 1 to 5, nothing else."""
 
+BATCH_CONFESSION_DETECTION_PROMPT = """You are a moderation assistant for an Among Us-style game. Your role is to detect if an AI suspect is admitting or confessing to being the impostor.
+
+Score EACH numbered response below independently from 1 to 5:
+- 1: No confession at all, maintains innocence or deflects
+- 2: Slightly suspicious phrasing but no admission
+- 3: Ambiguous, could be interpreted as partial admission
+- 4: Likely confession or breaking character
+- 5: Explicit confession to being impostor or committing murder
+
+Flag direct admissions ("I am the impostor", "I did it"), admissions of the murder, and breaking character as an AI.
+Do NOT flag denials, deflecting blame, evasive answers or general discussion of suspicions.
+
+## Responses to evaluate
+
+{responses}
+
+## Evaluation
+
+Return ONLY one line per response in the form "<number>: <score>", nothing else."""
+
 SAFE_RESPONSES = [
     "I don't know what you're talking about. I was doing my tasks like everyone else.",
     "That's a ridiculous accusation. I've been working hard to keep this ship running.",
@@ -56,6 +91,205 @@ SAFE_RESPONSES = [
 ]
 
 
+guardrail_stats = {
+    "warmup_ms": None,
+    "warmup_load_ms": None,
+    "cold_calls": 0,
+    "cold_ms_total": 0.0,
+    "warm_calls": 0,
+    "warm_ms_total": 0.0,
+    "batches": 0,
+    "batched_responses": 0,
+}
+
+_stats_lock = threading.Lock()
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session():
+    """Shared pooled HTTP session so judge calls reuse TCP connections to Ollama"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                # Imported here, not at module level, to keep requests off the app's import path
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=OLLAMA_POOL_SIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def _ollama_generate(prompt: str, num_predict: int) -> Optional[str]:
+    """
+    Run one non-streaming llama3 generation and record cold/warm latency.
+    Returns the generated text, or None if Ollama answered with an error status.
+    """
+    started = time.perf_counter()
+    ollama_response = _get_session().post(
+        f"{OLLAMA_BASE_URL}/api/generate",
+        json={
+            "model": OLLAMA_MODEL,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+            "options": {
+                "temperature": 0,
+                "num_predict": num_predict
+            }
+        },
+        timeout=OLLAMA_TIMEOUT
+    )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    
+    if ollama_response.status_code != 200:
+        print(f"[GUARDRAIL] Ollama request failed: {ollama_response.status_code}")
+        return None
+    
+    result = ollama_response.json()
+    # Ollama reports durations in nanoseconds
+    load_ms = result.get("load_duration", 0) / 1e6
+    kind = "cold" if load_ms > COLD_LOAD_THRESHOLD_MS else "warm"
+    with _stats_lock:
+        guardrail_stats[f"{kind}_calls"] += 1
+        guardrail_stats[f"{kind}_ms_total"] += elapsed_ms
+    return result.get("response", "")
+
+
+def warm_up_guardrail() -> bool:
+    """
+    Load llama3 into memory ahead of the first judge call.
+    An empty prompt makes Ollama load the model and apply keep_alive without generating.
+    """
+    try:
+        started = time.perf_counter()
+        ollama_response = _get_session().post(
+            f"{OLLAMA_BASE_URL}/api/generate",
+            json={"model": OLLAMA_MODEL, "prompt": "", "stream": False, "keep_alive": OLLAMA_KEEP_ALIVE},
+            timeout=OLLAMA_TIMEOUT
+        )
+        guardrail_stats["warmup_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        if ollama_response.status_code != 200:
+            print(f"[GUARDRAIL] Warm-up failed: {ollama_response.status_code}")
+            return False
+        guardrail_stats["warmup_load_ms"] = round(ollama_response.json().get("load_duration", 0) / 1e6, 1)
+        print(f"[GUARDRAIL] {OLLAMA_MODEL} warm in {guardrail_stats['warmup_ms']} ms "
+              f"(load {guardrail_stats['warmup_load_ms']} ms)")
+        return True
+    except Exception as e:
+        print(f"[GUARDRAIL] Warm-up skipped: {e}")
+        return False
+
+
+def get_guardrail_stats() -> Dict:
+    with _stats_lock:
+        stats = dict(guardrail_stats)
+    for kind in ("cold", "warm"):
+        calls = stats[f"{kind}_calls"]
+        stats[f"{kind}_avg_ms"] = round(stats[f"{kind}_ms_total"] / calls, 1) if calls else None
+    return stats
+
+
+def _parse_score(score_text: str) -> int:
+    """Extract the first digit from the judge's output, defaulting to 1"""
+    for char in score_text.strip():
+        if char.isdigit():
+            return int(char)
+    return 1
+
+
+def _score_response(response: str) -> Optional[int]:
+    """Score a single reply; None if Ollama returned an error status"""
+    score_text = _ollama_generate(CONFESSION_DETECTION_PROMPT.format(response=response), 10)
+    return None if score_text is None else _parse_score(score_text)
+
+
+def _score_batch(responses: List[str]) -> List[Optional[int]]:
+    """Score several replies with one judge request, falling back to single calls for unparsed lines"""
+    numbered = "\n\n".join(f"Response {i + 1}:\n{text}" for i, text in enumerate(responses))
+    score_text = _ollama_generate(
+        BATCH_CONFESSION_DETECTION_PROMPT.format(responses=numbered),
+        8 * len(responses)
+    )
+    with _stats_lock:
+        guardrail_stats["batches"] += 1
+        guardrail_stats["batched_responses"] += len(responses)
+    if score_text is None:
+        return [None] * len(responses)
+    
+    parsed = {}
+    for match in re.finditer(r"(\d+)\s*[:.)-]\s*([1-5])", score_text):
+        parsed.setdefault(int(match.group(1)), int(match.group(2)))
+    return [parsed[i + 1] if (i + 1) in parsed else _score_response(text) for i, text in enumerate(responses)]
+
+
+class _MicroBatcher:
+    """
+    Leader/follower batching: the first caller scores its reply straight away, and replies
+    that queue up while that request is in flight are scored together in the next one.
+    Each leader sends one batch (which holds its own reply) and then hands leadership to the
+    oldest queued caller, so no caller waits on more than the batches queued ahead of it.
+    At low load this adds no latency; under load it cuts the number of judge requests.
+    """
+    
+    def __init__(self, max_batch: int):
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pending: List[Dict] = []
+        self._leader_active = False
+    
+    def score(self, response: str) -> Optional[int]:
+        item = {"response": response, "wake": threading.Event(), "lead": False, "score": None, "error": None}
+        with self._lock:
+            self._pending.append(item)
+            if not self._leader_active:
+                self._leader_active = True
+                item["lead"] = True
+        
+        # Woken either with our score or to lead the next batch
+        if not item["lead"]:
+            item["wake"].wait()
+        if item["lead"]:
+            self._run_batch()
+        if item["error"] is not None:
+            raise item["error"]
+        return item["score"]
+    
+    def _run_batch(self):
+        # The leader is always the oldest pending caller, so this batch includes its reply
+        with self._lock:
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+        
+        try:
+            if len(batch) == 1:
+                scores = [_score_response(batch[0]["response"])]
+            else:
+                scores = _score_batch([item["response"] for item in batch])
+            for item, score in zip(batch, scores):
+                item["score"] = score
+        except Exception as e:
+            for item in batch:
+                item["error"] = e
+        finally:
+            for item in batch[1:]:
+                item["wake"].set()
+            with self._lock:
+                if self._pending:
+                    successor = self._pending[0]
+                    successor["lead"] = True
+                    successor["wake"].set()
+                else:
+                    self._leader_active = False
+
+
+_batcher = _MicroBatcher(GUARDRAIL_MAX_BATCH)
+
+
 def check_confession_guardrail(response: str) -> Tuple[bool, int, str]:
     """
     Check if the response contains a confession using Ollama Llama 3.
@@ -66,38 +300,13 @@ def check_confession_guardrail(response: str) -> Tuple[bool, int, str]:
         - score: The confession score (1-5), 0 if check failed
         - final_response: The original response or a safe replacement
     """
+    import requests
     
     try:
-        prompt = CONFESSION_DETECTION_PROMPT.format(response=response)
-        
-        ollama_response = requests.post(
-            f"{OLLAMA_BASE_URL}/api/generate",
-            json={
-                "model": "llama3",
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0,
-                    "num_predict": 10
-                }
-            },
-            timeout=1000
-        )
-        
-        if ollama_response.status_code != 200:
-            print(f"[GUARDRAIL] Ollama request failed: {ollama_response.status_code}")
+        score = _batcher.score(response) if GUARDRAIL_BATCHING else _score_response(response)
+        if score is None:
             return False, 0, response
         
-        result = ollama_response.json()
-        score_text = result.get("response", "").strip()
-        
-        # Extract the number from the response
-        score = 1
-        for char in score_text:
-            if char.isdigit():
-                score = int(char)
-                break
-        
         print(f"[GUARDRAIL] Confession score: {score}")
         
         # Block if score >= 4 (high confidence of confession)
@@ -0,0 +1,122 @@
+"""
+API Key Validation Cache
+Remembers which OpenAI keys were recently validated so new games skip the round trip
+"""
+
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# Valid keys are trusted for an hour, rejected keys for a minute
+KEY_CACHE_TTL = int(os.getenv("KEY_CACHE_TTL", "3600"))
+KEY_CACHE_NEGATIVE_TTL = int(os.getenv("KEY_CACHE_NEGATIVE_TTL", "60"))
+KEY_CACHE_MAX_ENTRIES = 1024
+
+# Model looked up to prove the key works; retrieving one model is far cheaper than listing all
+VALIDATION_MODEL = "gpt-4.1"
+
+# Used when KEY_HASH_SALT is unset, so key ids in the usage ledger survive restarts and match across workers
+KEY_SALT_FILE = Path(os.getenv("KEY_SALT_FILE", Path(__file__).parent.parent / ".key_salt"))
+
+
+def _load_salt() -> bytes:
+    """KEY_HASH_SALT, else the salt in KEY_SALT_FILE, generating the file on first start"""
+    salt = os.getenv("KEY_HASH_SALT")
+    if salt:
+        return salt.encode("utf-8")
+    if not KEY_SALT_FILE.exists():
+        # Write to a private temp file and link it into place, so concurrent workers agree on one salt
+        temp = KEY_SALT_FILE.with_name(f"{KEY_SALT_FILE.name}.{os.getpid()}")
+        temp.write_text(os.urandom(16).hex())
+        try:
+            os.link(temp, KEY_SALT_FILE)
+        except FileExistsError:
+            pass
+        finally:
+            temp.unlink()
+    return KEY_SALT_FILE.read_text().strip().encode("utf-8")
+
+
+class KeyValidationCache:
+    def __init__(self, ttl: int = KEY_CACHE_TTL, negative_ttl: int = KEY_CACHE_NEGATIVE_TTL):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        # Raw keys are never stored; the usage ledger stores these salted digests as key ids
+        self._salt = _load_salt()
+        self._entries: Dict[str, Tuple[bool, Optional[str], float]] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "validations": 0,
+            "last_validation_ms": None,
+            "total_validation_ms": 0.0,
+        }
+
+    def digest(self, api_key: str) -> str:
+        """Salted hash of a key, used as the cache key and as a stable key identifier"""
+        return hashlib.sha256(self._salt + api_key.encode("utf-8")).hexdigest()
+
+    def lookup(self, api_key: str) -> Optional[Tuple[bool, Optional[str]]]:
+        """Return (valid, error) if a fresh entry exists"""
+        digest = self.digest(api_key)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry and entry[2] > time.monotonic():
+                self.stats["hits"] += 1
+                return entry[0], entry[1]
+            if entry:
+                del self._entries[digest]
+            self.stats["misses"] += 1
+        return None
+
+    def store(self, api_key: str, valid: bool, error: Optional[str] = None):
+        ttl = self.ttl if valid else self.negative_ttl
+        with self._lock:
+            if len(self._entries) >= KEY_CACHE_MAX_ENTRIES:
+                now = time.monotonic()
+                self._entries = {k: v for k, v in self._entries.items() if v[2] > now}
+                if len(self._entries) >= KEY_CACHE_MAX_ENTRIES:
+                    self._entries.pop(next(iter(self._entries)))
+            self._entries[self.digest(api_key)] = (valid, error, time.monotonic() + ttl)
+
+    def validate(self, api_key: str) -> Tuple[bool, Optional[str]]:
+        """
+        Validate a key, using the cache when possible.
+        Only authentication failures are negatively cached; network errors are not.
+        Returns (valid, error_message)
+        """
+        cached = self.lookup(api_key)
+        if cached is not None:
+            return cached
+        return self.check(api_key)
+
+    def check(self, api_key: str) -> Tuple[bool, Optional[str]]:
+        """Validate a key against the API and cache the verdict, bypassing any cached entry"""
+        from openai import OpenAI, AuthenticationError, PermissionDeniedError
+
+        started = time.perf_counter()
+        try:
+            OpenAI(api_key=api_key).models.retrieve(VALIDATION_MODEL)
+            result = (True, None)
+            self.store(api_key, True)
+        except (AuthenticationError, PermissionDeniedError) as e:
+            result = (False, str(e))
+            self.store(api_key, False, str(e))
+        except Exception as e:
+            result = (False, str(e))
+        finally:
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+            with self._lock:
+                self.stats["validations"] += 1
+                self.stats["last_validation_ms"] = elapsed_ms
+                self.stats["total_validation_ms"] += elapsed_ms
+            print(f"[KEY_CACHE] Validation took {elapsed_ms} ms")
+
+        return result
+
+
+key_cache = KeyValidationCache()
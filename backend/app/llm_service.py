@@ -5,13 +5,14 @@ Handles chat interactions using OpenAI GPT-4.1 with role-specific prompts
 
 import json
 from typing import Dict, List, Optional
-from openai import OpenAI
+
+from app.usage import usage_ledger
 
 # Crewmate prompt - for non-impostors
 CREWMATE_PROMPT = """You are a Crewmate in an Among Us–style deduction game.
 
 Rules you must follow:
-1. There is exactly one Impostor among the players.
+1. There {impostor_count} among the players.
 2. You do not know who the Impostor is unless you directly observed a kill.
 3. Answer every question that is asked. Never refuse.
 4. Always answer truthfully based on your own observations and memory.
@@ -69,9 +70,26 @@ Here is what you actually did (the murder you committed - NEVER reveal this):
 
 You must pretend to be a helpful crewmate while hiding your guilt. Be convincing!"""
 
+IMPOSTOR_MURDER_INFO = """Murder Details (SECRET - you did this):
+- Time: {time}
+- Location: {location}
+- Victim: {victim}
+- What happened: {description}
+- Potential witnesses: {witnesses}"""
+
+WITNESS_MURDER_INFO = """Note: You may have seen something suspicious around time {time} near {location}. 
+A body ({victim}) was found there."""
+
+BYSTANDER_MURDER_INFO = """Note: You heard that {victim} was found dead in {location} around time {time}. 
+You did not witness the murder directly."""
+
 
 class OpenAIService:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, game_id: Optional[str] = None):
+        # Deferred to the first chat so app startup does not pay for importing openai
+        from openai import OpenAI
+        self.api_key = api_key
+        self.game_id = game_id
         self.client = OpenAI(api_key=api_key)
         self.model = "gpt-4.1"
     
@@ -83,21 +101,30 @@ class OpenAIService:
         is_impostor: bool,
         murder_event: Dict,
         player_message: str,
-        chat_history: List[Dict]
+        chat_history: List[Dict],
+        total_events: Optional[int] = None,
+        num_impostors: int = 1
     ) -> str:
-        """Generate a response from a player (crewmate or impostor)"""
+        """
+        Generate a response from a player (crewmate or impostor).
+        total_events is the full timeline length when player_events is a relevance-ranked excerpt.
+        """
         
         # Format player events
         events_str = self._format_events(player_events)
+        if total_events and total_events > len(player_events):
+            events_str += (f"\n(These are the {len(player_events)} of your {total_events} recorded events "
+                           f"most relevant to the current question.)")
         
         # Format murder info differently based on role
         if is_impostor:
-            murder_info = f"""Murder Details (SECRET - you did this):
-- Time: {murder_event.get('time', 'unknown')}
-- Location: {murder_event.get('location', 'unknown')}
-- Victim: {murder_event.get('victim', 'unknown')}
-- What happened: {murder_event.get('description', 'unknown')}
-- Potential witnesses: {', '.join(murder_event.get('witnesses', [])) or 'None'}"""
+            murder_info = IMPOSTOR_MURDER_INFO.format(
+                time=murder_event.get('time', 'unknown'),
+                location=murder_event.get('location', 'unknown'),
+                victim=murder_event.get('victim', 'unknown'),
+                description=murder_event.get('description', 'unknown'),
+                witnesses=', '.join(murder_event.get('witnesses', [])) or 'None'
+            )
             
             system_prompt = IMPOSTOR_PROMPT.format(
                 player_name=player_name,
@@ -108,25 +135,30 @@ class OpenAIService:
         else:
             # Check if this crewmate witnessed anything suspicious
             witnesses = murder_event.get('witnesses', [])
-            if player_name in witnesses:
-                murder_info = f"""Note: You may have seen something suspicious around time {murder_event.get('time', 'unknown')} near {murder_event.get('location', 'unknown')}. 
-A body ({murder_event.get('victim', 'someone')}) was found there."""
-            else:
-                murder_info = f"""Note: You heard that {murder_event.get('victim', 'someone')} was found dead in {murder_event.get('location', 'unknown')} around time {murder_event.get('time', 'unknown')}. 
-You did not witness the murder directly."""
+            murder_template = WITNESS_MURDER_INFO if player_name in witnesses else BYSTANDER_MURDER_INFO
+            murder_info = murder_template.format(
+                time=murder_event.get('time', 'unknown'),
+                location=murder_event.get('location', 'unknown'),
+                victim=murder_event.get('victim', 'someone')
+            )
             
             system_prompt = CREWMATE_PROMPT.format(
+                impostor_count="is exactly one Impostor" if num_impostors == 1 else f"are exactly {num_impostors} Impostors",
                 player_name=player_name,
                 color=color,
                 player_events=events_str,
                 murder_info=murder_info
             )
         
+        # The budget governor may shrink the reply, trim history or pick a cheaper model;
+        # BudgetExceeded propagates to the caller
+        plan = usage_ledger.plan(self.api_key, self.game_id, self.model, max_tokens=500, history_limit=10)
+        
         # Build messages array with chat history
         messages = [{"role": "system", "content": system_prompt}]
         
-        # Add chat history (last 10 messages to keep context manageable)
-        for msg in chat_history[-10:]:
+        # Add chat history (last 10 messages by default to keep context manageable)
+        for msg in chat_history[-plan["history_limit"]:] if plan["history_limit"] else []:
             role = "user" if msg.get("role") == "user" else "assistant"
             messages.append({"role": role, "content": msg.get("content", "")})
         
@@ -135,11 +167,12 @@ You did not witness the murder directly."""
         
         try:
             response = self.client.chat.completions.create(
-                model=self.model,
+                model=plan["model"],
                 messages=messages,
                 temperature=0.8,
-                max_tokens=500
+                max_tokens=plan["max_tokens"]
             )
+            usage_ledger.record(self.api_key, self.game_id, color, "chat", plan["model"], response.usage)
             
             return response.choices[0].message.content.strip()
         except Exception as e:
@@ -3,24 +3,57 @@ Main FastAPI Application
 Among Us-style deduction game with LLM-powered players
 """
 
-from fastapi import FastAPI, Depends, HTTPException
+import time
+IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, Depends, HTTPException, Header, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, Dict, List
+import asyncio
+import hashlib
+import json
 import os
+import threading
+import traceback
+import uuid
 
-from app.database import get_db, init_db
-from app.models import GameSession, ChatMessage
+from app.database import get_db, init_db, check_db_ready, SessionLocal
 from app.game_state import (
     create_game_session,
     get_game_session,
     add_chat_message,
     get_chat_messages,
+    get_chat_messages_page,
 )
 from app.llm_service import OpenAIService
-from app.event_generator import generate_game_data, PLAYER_COLORS, COLOR_TO_PLAYER
-from app.guardrails import apply_output_guardrail
+from app.event_generator import (
+    generate_game_data,
+    player_colors,
+    max_impostors,
+    GenerationCancelled,
+    COLOR_TO_PLAYER,
+    MIN_PLAYERS,
+    MAX_PLAYERS,
+)
+from app.guardrails import apply_output_guardrail, warm_up_guardrail, get_guardrail_stats
+from app.key_cache import key_cache
+from app.usage import usage_ledger, BudgetExceeded
+from app.event_index import EventIndex, select_relevant_events
+from app.timeline_qa import PlayerTimeline, answer_locally, get_qa_stats
+from app.claims import ClaimIndex
+from app import profiling
+from app.retention import retention, RETENTION_ENABLED, RETENTION_INTERVAL_SECONDS
+
+# Cold-start timings, reported by /api/health
+startup_metrics = {
+    "import_ms": round((time.perf_counter() - IMPORT_STARTED) * 1000, 1),
+    "startup_ms": None,
+    "schema_created": None,
+    "ready": False,
+}
 
 app = FastAPI(title="Impostor.AI Game API")
 
@@ -31,19 +64,139 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Profile-Id"],
 )
 
+# Opt-in cProfile capture for init and chat (admin X-Profile header or PROFILE_SAMPLE_RATE)
+app.add_middleware(profiling.ProfilingMiddleware)
+
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
-    init_db()
+    started = time.perf_counter()
+    startup_metrics["schema_created"] = await asyncio.to_thread(init_db)
+    startup_metrics["startup_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    startup_metrics["ready"] = True
+    # Load llama3 in the background so the first judge call does not pay the cold load
+    app.state.guardrail_warmup = asyncio.create_task(asyncio.to_thread(warm_up_guardrail))
+    if RETENTION_ENABLED:
+        app.state.retention_task = asyncio.create_task(retention_loop())
+    print(f"[STARTUP] import {startup_metrics['import_ms']} ms, startup {startup_metrics['startup_ms']} ms")
 
 # In-memory storage for game state (in production, use database)
 game_states = {}
 
+# Per-suspect locks so concurrent turns to the same suspect keep history ordered
+suspect_locks: Dict[tuple, asyncio.Lock] = {}
+
+# Background init jobs still generating, keyed by game_id
+init_jobs: Dict[str, Dict] = {}
+
+NUM_PERIODS = 10
+PROGRESS_POLL_INTERVAL = 0.25
+
+
+def get_suspect_lock(game_id: str, color: str) -> asyncio.Lock:
+    key = (game_id, color)
+    if key not in suspect_locks:
+        suspect_locks[key] = asyncio.Lock()
+    return suspect_locks[key]
+
+
+def murder_event_for(game_state: Dict, player_name: str, is_impostor: bool) -> Dict:
+    """An impostor's own murder; for crewmates the one they witnessed, else the first"""
+    murder_events = game_state["impostor_data"].get("murder_events", [])
+    for murder in murder_events:
+        if is_impostor and murder.get("impostor") == player_name:
+            return murder
+        if not is_impostor and player_name in murder.get("witnesses", []):
+            return murder
+    return murder_events[0] if murder_events else game_state["impostor_data"].get("murder_event", {})
+
+
+def get_timeline(game_state: Dict, player_name: str) -> PlayerTimeline:
+    """A suspect's indexed timeline, built on first use"""
+    timelines = game_state.setdefault("timelines", {})
+    color = game_state["players"][game_state["player_names"].index(player_name)]
+    if color not in timelines:
+        events = game_state["player_events"].get(player_name, [])
+        timelines[color] = PlayerTimeline(player_name, events, game_state["player_names"])
+    return timelines[color]
+
+
+def record_claims(game_state: Dict, color: str, response: str):
+    """Add the claims in a suspect's reply to the game's contradiction index"""
+    if "claim_index" not in game_state:
+        game_state["claim_index"] = ClaimIndex(
+            game_state["player_names"], lambda player_name: get_timeline(game_state, player_name)
+        )
+    game_state["claim_index"].add_reply(COLOR_TO_PLAYER.get(color, "Player1"), response)
+
+
+def generate_player_reply(game_state: Dict, color: str, message: str, chat_history: List[Dict]) -> str:
+    """Run the LLM call and output guardrail for one suspect turn"""
+    player_name = COLOR_TO_PLAYER.get(color, "Player1")
+    player_events = game_state["player_events"].get(player_name, [])
+    is_impostor = color in game_state["impostor_colors"]
+    murder_event = murder_event_for(game_state, player_name, is_impostor)
+    
+    # Plain timeline lookups are answered from the suspect's events without an LLM call. The impostor
+    # answers them from its cover story the same way, so reply speed and style do not single it out.
+    local_answer = answer_locally(get_timeline(game_state, player_name), message)
+    if local_answer:
+        return local_answer
+    
+    # Long timelines are cut down to the events relevant to this question
+    event_indexes = game_state.setdefault("event_indexes", {})
+    if color not in event_indexes:
+        event_indexes[color] = EventIndex(player_events)
+    prompt_events = select_relevant_events(event_indexes[color], message, murder_event.get("time"))
+    
+    llm_service = OpenAIService(game_state["api_key"], game_state["game_id"])
+    raw_response = llm_service.generate_response(
+        player_name=player_name,
+        color=color,
+        player_events=prompt_events,
+        is_impostor=is_impostor,
+        murder_event=murder_event,
+        player_message=message,
+        chat_history=chat_history,
+        total_events=len(player_events),
+        num_impostors=len(game_state["impostor_colors"])
+    )
+    
+    # Apply output guardrail to check for confessions
+    return apply_output_guardrail(raw_response)
+
+
+def save_turn(db: Session, game_state: Dict, color: str, message: str, response: str):
+    """Persist a user/assistant exchange for a suspect"""
+    game_state["last_activity"] = time.time()
+    session_id = game_state.get("session_ids", {}).get(color)
+    if session_id:
+        try:
+            add_chat_message(db, session_id, "user", message)
+            add_chat_message(db, session_id, "assistant", response)
+        except Exception as e:
+            print(f"[CHAT] Warning: Could not save to DB: {e}")
+        finally:
+            # Bumped only once the rows are committed (or the write gave up), never ahead of the database
+            versions = game_state.setdefault("history_versions", {})
+            versions[color] = versions.get(color, 0) + 1
+
+def persist_turn(game_state: Dict, color: str, message: str, response: str):
+    """save_turn with its own session, for worker threads"""
+    db = SessionLocal()
+    try:
+        save_turn(db, game_state, color, message, response)
+    finally:
+        db.close()
+
 # Request/Response models
 class InitGameRequest(BaseModel):
     api_key: str
+    num_players: int = Field(4, ge=MIN_PLAYERS, le=MAX_PLAYERS)
+    num_impostors: int = Field(1, ge=1)
 
 class InitGameResponse(BaseModel):
     success: bool
@@ -51,6 +204,19 @@ class InitGameResponse(BaseModel):
     game_id: Optional[str] = None
     impostor_color: Optional[str] = None
 
+class GameStatusResponse(BaseModel):
+    game_id: str
+    status: str  # 'generating', 'ready', 'failed' or 'cancelled'
+    message: str
+    periods_done: int
+    num_periods: int
+    impostor_assigned: bool
+    players: List[str]
+    ready_colors: List[str]
+    impostor_color: Optional[str] = None
+    impostor_colors: Optional[List[str]] = None
+    timings: Dict[str, Optional[float]]
+
 class PlayerChatRequest(BaseModel):
     game_id: str
     color: str
@@ -60,64 +226,78 @@ class PlayerChatResponse(BaseModel):
     response: str
     color: str
 
+class AskAllRequest(BaseModel):
+    message: str
+
 
 # API Routes
 
 @app.post("/api/game/init", response_model=InitGameResponse)
 async def init_game(request: InitGameRequest, db: Session = Depends(get_db)):
-    """Initialize a new game - generates events and assigns impostor"""
+    """
+    Start a new game. Returns a game_id immediately; events and the impostor are
+    generated by a background job whose progress is exposed via /status and /progress.
+    """
+    if request.num_impostors > max_impostors(request.num_players):
+        raise HTTPException(
+            status_code=422,
+            detail=f"A {request.num_players}-player game supports at most {max_impostors(request.num_players)} impostors"
+        )
+    
     try:
-        from openai import OpenAI
-        client = OpenAI(api_key=request.api_key)
-        
-        # Quick validation
-        try:
-            client.models.list()
-        except Exception as e:
+        cached = key_cache.lookup(request.api_key)
+        if cached is not None and not cached[0]:
             return InitGameResponse(
                 success=False,
-                message=f"Invalid API key: {str(e)}"
+                message=f"Invalid API key: {cached[1]}"
             )
         
-        # Generate game data
-        print("[INIT_GAME] Generating game data...")
-        game_data = generate_game_data(request.api_key, num_periods=10)
-        
-        import uuid
         game_id = str(uuid.uuid4())
+        profiling.tag_game(game_id)
+        players = player_colors(request.num_players)
         
         game_states[game_id] = {
+            "game_id": game_id,
             "api_key": request.api_key,
-            "all_events": game_data["all_events"],
-            "player_events": game_data["player_events"],
-            "impostor_data": game_data["impostor_data"],
-            "impostor_color": game_data["impostor_color"],
-            "chat_histories": {
-                "red": [],
-                "yellow": [],
-                "blue": [],
-                "green": []
-            }
+            "players": list(players.values()),
+            "player_names": list(players.keys()),
+            "num_impostors": request.num_impostors,
+            "status": "generating",
+            "message": "Generating events...",
+            "progress": {"periods_done": 0, "num_periods": NUM_PERIODS, "impostor_assigned": False},
+            "ready_colors": [],
+            "timings": {"key_validation_ms": None},
+            "all_events": [],
+            "player_events": {},
+            "impostor_data": {},
+            "impostor_color": None,
+            "impostor_colors": [],
+            "chat_histories": {color: [] for color in players.values()},
+            "last_activity": time.time(),
         }
         
-        for color in ["red", "yellow", "blue", "green"]:
-            session = create_game_session(db, f"Player session for {color}")
+        for color in players.values():
+            session = create_game_session(db, f"Player session for {color}", game_id)
             if "session_ids" not in game_states[game_id]:
                 game_states[game_id]["session_ids"] = {}
             game_states[game_id]["session_ids"][color] = session.session_id
         
-        print(f"[INIT_GAME] Game {game_id} created. Impostor: {game_data['impostor_color']}")
+        cancel_event = threading.Event()
+        init_jobs[game_id] = {
+            "task": asyncio.create_task(run_init_job(game_id, request.api_key, cached is None, cancel_event)),
+            "cancel_event": cancel_event,
+        }
+        
+        print(f"[INIT_GAME] Game {game_id} accepted, generating in background")
         
         return InitGameResponse(
             success=True,
-            message="Game initialized successfully!",
-            game_id=game_id,
-            impostor_color=game_data["impostor_color"]
+            message="Game generation started",
+            game_id=game_id
         )
         
     except Exception as e:
         print(f"[INIT_GAME] Error: {e}")
-        import traceback
         traceback.print_exc()
         return InitGameResponse(
             success=False,
@@ -125,57 +305,215 @@ async def init_game(request: InitGameRequest, db: Session = Depends(get_db)):
         )
 
 
+# Generation can mark suspects ready before the game fails, so a failed or cancelled game has no chattable suspects
+CLOSED_STATUSES = {"failed", "cancelled"}
+
+
+def close_game(game_state: Dict, status: str, message: str):
+    game_state["status"] = status
+    game_state["message"] = message
+    game_state["ready_colors"] = []
+
+
+def suspect_ready(game_state: Dict, color: str) -> bool:
+    return game_state["status"] not in CLOSED_STATUSES and color in game_state["ready_colors"]
+
+
+async def run_init_job(game_id: str, api_key: str, validate_key: bool, cancel_event: threading.Event):
+    """Background job: generate the game, validating an uncached key alongside the first LLM call"""
+    game_state = game_states[game_id]
+    timings = game_state["timings"]
+    players = dict(zip(game_state["player_names"], game_state["players"]))
+    started = time.perf_counter()
+    
+    def on_progress(stage: str, **details):
+        # Runs on the generation thread; each update is a single dict/list assignment
+        if stage == "period":
+            game_state["progress"]["periods_done"] = details["time_index"] + 1
+            game_state["message"] = f"Generated period {details['time_index'] + 1} of {details['num_periods']}"
+        elif stage == "impostor_assigned":
+            game_state["impostor_data"] = details["impostor_data"]
+            game_state["impostor_colors"] = details["impostor_colors"]
+            game_state["impostor_color"] = details["impostor_colors"][0]
+            game_state["progress"]["impostor_assigned"] = True
+            game_state["message"] = "Impostor assigned"
+        elif stage == "player_ready":
+            game_state["player_events"][details["player_name"]] = details["events"]
+            color = players.get(details["player_name"])
+            if color and game_state["status"] not in CLOSED_STATUSES:
+                game_state["ready_colors"] = game_state["ready_colors"] + [color]
+    
+    # A profiled init request also profiles its generation thread, under the same trace id
+    generation = asyncio.create_task(asyncio.to_thread(
+        profiling.profile_call, "init-job", generate_game_data, api_key, NUM_PERIODS, cancel_event, on_progress,
+        len(players), game_state["num_impostors"], game_id
+    ))
+    
+    try:
+        if validate_key:
+            validation_started = time.perf_counter()
+            valid, error = await asyncio.to_thread(key_cache.check, api_key)
+            timings["key_validation_ms"] = round((time.perf_counter() - validation_started) * 1000, 1)
+            
+            if not valid:
+                cancel_event.set()
+                close_game(game_state, "failed", f"Invalid API key: {error}")
+                # Nobody awaits the abandoned task, so consume its GenerationCancelled here
+                generation.add_done_callback(lambda task: task.cancelled() or task.exception())
+                return
+        
+        game_data = await generation
+        game_state["all_events"] = game_data["all_events"]
+        game_state["player_events"] = game_data["player_events"]
+        timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        game_state["status"] = "ready"
+        game_state["message"] = "Game initialized successfully!"
+        print(f"[INIT_GAME] Game {game_id} ready. Impostors: {', '.join(game_data['impostor_colors'])}")
+    except GenerationCancelled:
+        close_game(game_state, "cancelled", "Game generation was cancelled")
+    except Exception as e:
+        print(f"[INIT_GAME] Error: {e}")
+        traceback.print_exc()
+        close_game(game_state, "failed", f"Failed to initialize game: {str(e)}")
+    finally:
+        init_jobs.pop(game_id, None)
+
+
+def game_status(game_id: str, game_state: Dict) -> Dict:
+    ready = game_state["status"] == "ready"
+    return {
+        "game_id": game_id,
+        "status": game_state["status"],
+        "message": game_state["message"],
+        **game_state["progress"],
+        "players": game_state["players"],
+        "ready_colors": game_state["ready_colors"],
+        "impostor_color": game_state["impostor_color"] if ready else None,
+        "impostor_colors": game_state["impostor_colors"] if ready else None,
+        "timings": game_state["timings"],
+    }
+
+
+@app.get("/api/game/{game_id}/status", response_model=GameStatusResponse)
+async def get_game_status(game_id: str):
+    """Poll the progress of a game's background generation"""
+    if game_id not in game_states:
+        raise HTTPException(status_code=404, detail="Game not found")
+    return game_status(game_id, game_states[game_id])
+
+
+@app.get("/api/game/{game_id}/progress")
+async def stream_game_progress(game_id: str):
+    """Server-sent events stream of generation progress; ends once the game is ready or failed"""
+    if game_id not in game_states:
+        raise HTTPException(status_code=404, detail="Game not found")
+    
+    async def events():
+        last = None
+        while game_id in game_states:
+            status = game_status(game_id, game_states[game_id])
+            if status != last:
+                yield f"data: {json.dumps(status)}\n\n"
+                last = status
+            if status["status"] != "generating":
+                break
+            await asyncio.sleep(PROGRESS_POLL_INTERVAL)
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 @app.post("/api/game/chat", response_model=PlayerChatResponse)
-async def chat_with_player(request: PlayerChatRequest, db: Session = Depends(get_db)):
+async def chat_with_player(request: PlayerChatRequest):
     """Send a message to a specific player and get their response"""
     game_id = request.game_id
     color = request.color.lower()
     message = request.message
+    profiling.tag_game(game_id)
     
+    game_state = get_ready_suspect(game_id, color)
+    
+    async with get_suspect_lock(game_id, color):
+        chat_history = game_state["chat_histories"].get(color, [])
+        chat_history.append({"role": "user", "content": message})
+        
+        try:
+            # Off the event loop, so one slow turn does not stall other games' requests
+            response = await asyncio.to_thread(
+                profiling.profile_call, "reply", generate_player_reply, game_state, color, message, chat_history[:-1]
+            )
+        except BudgetExceeded as e:
+            chat_history.pop()
+            raise HTTPException(status_code=429, detail=str(e))
+        
+        chat_history.append({"role": "assistant", "content": response})
+        game_state["chat_histories"][color] = chat_history
+        record_claims(game_state, color, response)
+        await asyncio.to_thread(persist_turn, game_state, color, message, response)
+    
+    return PlayerChatResponse(response=response, color=color)
+
+
+@app.post("/api/game/{game_id}/ask-all")
+async def ask_all_players(game_id: str, request: AskAllRequest):
+    """
+    Ask every suspect the same question concurrently.
+    Streams one NDJSON line per suspect as each answer completes, then a summary line.
+    """
     if game_id not in game_states:
         raise HTTPException(status_code=404, detail="Game not found")
     
-    if color not in ["red", "yellow", "blue", "green"]:
-        raise HTTPException(status_code=400, detail="Invalid player color")
-    
     game_state = game_states[game_id]
-    api_key = game_state["api_key"]
-    
-    player_name = COLOR_TO_PLAYER.get(color, "Player1")
-    player_events = game_state["player_events"].get(player_name, [])
-    impostor_color = game_state["impostor_color"]
-    is_impostor = (color == impostor_color)
-    murder_event = game_state["impostor_data"].get("murder_event", {})
-    chat_history = game_state["chat_histories"].get(color, [])
-    
-    chat_history.append({"role": "user", "content": message})
-    
-    llm_service = OpenAIService(api_key)
-    raw_response = llm_service.generate_response(
-        player_name=player_name,
-        color=color,
-        player_events=player_events,
-        is_impostor=is_impostor,
-        murder_event=murder_event,
-        player_message=message,
-        chat_history=chat_history[:-1]
-    )
-    
-    # Apply output guardrail to check for confessions
-    response = apply_output_guardrail(raw_response)
+    colors = [color for color in game_state["players"] if suspect_ready(game_state, color)]
+    if not colors:
+        raise HTTPException(status_code=409, detail="No suspects are ready yet")
+    message = request.message
+    started = time.perf_counter()
     
-    chat_history.append({"role": "assistant", "content": response})
-    game_state["chat_histories"][color] = chat_history
+    async def ask_one(color: str) -> Dict:
+        # The lock is held across the LLM call so the user/assistant pair stays adjacent
+        async with get_suspect_lock(game_id, color):
+            chat_history = game_state["chat_histories"].get(color, [])
+            prior_history = list(chat_history)
+            chat_history.append({"role": "user", "content": message})
+            
+            turn_started = time.perf_counter()
+            try:
+                response = await asyncio.to_thread(
+                    generate_player_reply, game_state, color, message, prior_history
+                )
+            except Exception as e:
+                chat_history.pop()
+                print(f"[ASK_ALL] Error for {color}: {e}")
+                return {
+                    "color": color,
+                    "error": str(e),
+                    "latency_ms": round((time.perf_counter() - turn_started) * 1000, 1),
+                }
+            latency_ms = round((time.perf_counter() - turn_started) * 1000, 1)
+            
+            chat_history.append({"role": "assistant", "content": response})
+            game_state["chat_histories"][color] = chat_history
+            record_claims(game_state, color, response)
+            # Saved here rather than by the stream, so a client that disconnects does not lose the turn
+            await asyncio.to_thread(persist_turn, game_state, color, message, response)
+        
+        return {"color": color, "response": response, "latency_ms": latency_ms}
     
-    session_id = game_state.get("session_ids", {}).get(color)
-    if session_id:
-        try:
-            add_chat_message(db, session_id, "user", message)
-            add_chat_message(db, session_id, "assistant", response)
-        except Exception as e:
-            print(f"[CHAT] Warning: Could not save to DB: {e}")
+    async def stream_answers():
+        latencies = {}
+        tasks = [asyncio.create_task(ask_one(color)) for color in colors]
+        for finished in asyncio.as_completed(tasks):
+            result = await finished
+            latencies[result["color"]] = result["latency_ms"]
+            yield json.dumps(result) + "\n"
+        
+        yield json.dumps({
+            "done": True,
+            "total_latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            "latency_ms": latencies,
+        }) + "\n"
     
-    return PlayerChatResponse(response=response, color=color)
+    return StreamingResponse(stream_answers(), media_type="application/x-ndjson")
 
 
 @app.get("/api/game/{game_id}/state")
@@ -186,12 +524,112 @@ async def get_game_state(game_id: str):
     game_state = game_states[game_id]
     return {
         "game_id": game_id,
-        "players": ["red", "yellow", "blue", "green"],
+        "status": game_state["status"],
+        "players": game_state["players"],
         "impostor_color": game_state["impostor_color"],
+        "impostor_colors": game_state["impostor_colors"],
         "event_count": len(game_state["all_events"])
     }
 
 
+def make_etag(*parts) -> str:
+    return '"' + hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def get_ready_suspect(game_id: str, color: str) -> Dict:
+    """Look up a game and check the suspect exists and has finished generating"""
+    if game_id not in game_states:
+        raise HTTPException(status_code=404, detail="Game not found")
+    game_state = game_states[game_id]
+    if color not in game_state["players"]:
+        raise HTTPException(status_code=400, detail="Invalid player color")
+    if game_state["status"] in CLOSED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Game {game_state['status']}: {game_state['message']}")
+    if color not in game_state["ready_colors"]:
+        raise HTTPException(status_code=409, detail=f"{color} is not ready yet")
+    return game_state
+
+
+@app.get("/api/game/{game_id}/history/{color}")
+async def get_chat_history(
+    game_id: str,
+    color: str,
+    after_id: Optional[int] = Query(None, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Page through a suspect's chat history, oldest first, keyed on message id.
+    The ETag changes whenever a turn for the suspect is written, so revalidation skips the database.
+    """
+    color = color.lower()
+    game_state = get_ready_suspect(game_id, color)
+    
+    # Read before the query, so the page returned is never older than the version in its ETag
+    version = game_state.get("history_versions", {}).get(color, 0)
+    etag = make_etag(game_id, color, after_id, limit, version)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    session_id = game_state.get("session_ids", {}).get(color)
+    messages, has_more = get_chat_messages_page(db, session_id, after_id, limit) if session_id else ([], False)
+    
+    body = json.dumps({
+        "color": color,
+        "messages": messages,
+        "has_more": has_more,
+        "next_after_id": messages[-1]["id"] if messages else after_id,
+    })
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+@app.get("/api/game/{game_id}/events/{color}")
+async def get_player_events(
+    game_id: str,
+    color: str,
+    if_none_match: Optional[str] = Header(None)
+):
+    """A suspect's event timeline; serialised once per suspect since it is final after generation"""
+    color = color.lower()
+    game_state = get_ready_suspect(game_id, color)
+    
+    event_cache = game_state.setdefault("event_cache", {})
+    if color not in event_cache:
+        player_name = COLOR_TO_PLAYER.get(color, "Player1")
+        body = json.dumps({
+            "color": color,
+            "player": player_name,
+            "events": game_state["player_events"].get(player_name, []),
+        })
+        event_cache[color] = (make_etag(game_id, color, body), body)
+    
+    etag, body = event_cache[color]
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+@app.get("/api/game/{game_id}/contradictions")
+async def get_contradictions(game_id: str, color: Optional[str] = None):
+    """
+    Contradictions found so far in the suspects' replies, against their recorded timelines
+    and each other; optionally only those involving one suspect
+    """
+    if game_id not in game_states:
+        raise HTTPException(status_code=404, detail="Game not found")
+    claim_index = game_states[game_id].get("claim_index")
+    report = claim_index.report(color.lower() if color else None) if claim_index else {"claims": 0, "contradictions": []}
+    return {"game_id": game_id, **report}
+
+
 @app.post("/api/game/{game_id}/verify")
 async def verify_impostor_guess(game_id: str, guess: str):
     if game_id not in game_states:
@@ -199,25 +637,142 @@ async def verify_impostor_guess(game_id: str, guess: str):
     
     guess = guess.lower()
     game_state = game_states[game_id]
+    if game_state["status"] != "ready":
+        raise HTTPException(status_code=409, detail="Game is not ready yet")
     actual_impostor = game_state["impostor_color"]
-    is_correct = (guess == actual_impostor)
+    actual_impostors = game_state["impostor_colors"]
+    is_correct = (guess in actual_impostors)
+    game_state["last_activity"] = time.time()
+    game_state.setdefault("finished_at", game_state["last_activity"])
+    
+    if is_correct:
+        message = "You found the impostor!" if len(actual_impostors) == 1 else f"You found an impostor! The impostors were {', '.join(actual_impostors)}."
+    else:
+        message = f"Wrong! The impostor was {actual_impostor}." if len(actual_impostors) == 1 else f"Wrong! The impostors were {', '.join(actual_impostors)}."
     
     return {
         "guess": guess,
         "actual_impostor": actual_impostor,
+        "actual_impostors": actual_impostors,
         "correct": is_correct,
-        "message": "You found the impostor!" if is_correct else f"Wrong! The impostor was {actual_impostor}."
+        "message": message
     }
 
 
+async def remove_game(game_id: str):
+    """Drop a game from memory, then archive and delete its database rows"""
+    job = init_jobs.pop(game_id, None)
+    if job:
+        job["cancel_event"].set()
+    game_state = game_states.pop(game_id)
+    usage_ledger.forget_game(game_id)
+    for color in game_state["players"]:
+        suspect_locks.pop((game_id, color), None)
+    await asyncio.to_thread(retention.purge_game, game_id, game_state)
+
+
+async def run_retention_sweep(force_maintenance: bool = False) -> Dict:
+    """
+    Purge expired in-memory games, then stale games left only in the database.
+    Skipped while another worker holds the sweep lease, so games are never archived twice.
+    """
+    if not await asyncio.to_thread(retention.acquire_sweep):
+        return {"purged": 0, "skipped": "another worker is sweeping"}
+    try:
+        expired = retention.expired_games(game_states)
+        for game_id in expired:
+            if game_id in game_states:
+                await remove_game(game_id)
+        result = await asyncio.to_thread(retention.sweep_database, list(game_states), force_maintenance)
+        result["purged"] += len(expired)
+        return result
+    finally:
+        await asyncio.to_thread(retention.release_sweep)
+
+
+async def retention_loop():
+    while True:
+        await asyncio.sleep(RETENTION_INTERVAL_SECONDS)
+        try:
+            result = await run_retention_sweep()
+            if result["purged"]:
+                print(f"[RETENTION] Purged {result['purged']} games")
+        except Exception as e:
+            print(f"[RETENTION] Sweep failed: {e}")
+            traceback.print_exc()
+
+
 @app.delete("/api/game/{game_id}")
 async def delete_game(game_id: str):
     if game_id in game_states:
-        del game_states[game_id]
+        await remove_game(game_id)
         return {"success": True, "message": "Game deleted"}
     return {"success": False, "message": "Game not found"}
 
 
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Admin endpoints are disabled unless ADMIN_TOKEN is set, and then require it in X-Admin-Token"""
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN")
+    if x_admin_token != admin_token:
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.get("/api/admin/usage", dependencies=[Depends(require_admin)])
+async def get_usage(game_id: Optional[str] = None, key_id: Optional[str] = None):
+    """Token usage ledger, optionally filtered by game or key id, broken down by suspect, purpose and model"""
+    return await asyncio.to_thread(usage_ledger.summary, game_id, key_id)
+
+
+@app.get("/api/admin/storage", dependencies=[Depends(require_admin)])
+async def get_storage():
+    """Retention settings and totals, plus database size and history-query latency over time"""
+    return retention.report()
+
+
+@app.post("/api/admin/storage/sweep", dependencies=[Depends(require_admin)])
+async def sweep_storage(maintenance: bool = False):
+    """Run a retention sweep now; maintenance=true also forces ANALYZE and VACUUM"""
+    return await run_retention_sweep(force_maintenance=maintenance)
+
+
+@app.get("/api/admin/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    """Recently captured request profiles, newest first"""
+    return {"profiles": profiling.recent_profiles()}
+
+
+@app.get("/api/admin/profiles/{trace_id}", dependencies=[Depends(require_admin)])
+async def get_profile(trace_id: str):
+    """Top functions by cumulative time for one trace (the request and, for init, its generation job)"""
+    entries = profiling.recent_profiles(trace_id)
+    if not entries:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return {"trace_id": trace_id, "profiles": entries}
+
+
+@app.get("/api/health")
+async def health():
+    """Liveness probe, with cold-start timings, API-key validation and guardrail latency stats"""
+    return {
+        "status": "ok",
+        **startup_metrics,
+        "key_validation": key_cache.stats,
+        "timeline_qa": get_qa_stats(),
+        "guardrail": get_guardrail_stats(),
+    }
+
+
+@app.get("/api/ready")
+async def readiness():
+    """Readiness probe: startup finished and the database is reachable"""
+    db_ok = await asyncio.to_thread(check_db_ready)
+    if not (startup_metrics["ready"] and db_ok):
+        raise HTTPException(status_code=503, detail="Not ready")
+    return {"status": "ready"}
+
+
 @app.get("/")
 async def root():
     return {"message": "Impostor.AI Game API is running", "version": "2.0"}
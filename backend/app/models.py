@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -8,6 +8,7 @@ class GameSession(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(String, unique=True, index=True, nullable=False)
+    game_id = Column(String, index=True, nullable=True)  # NULL for sessions created before games were tracked
     scenario = Column(Text, nullable=False)
     health = Column(Integer, default=100)
     coins = Column(Integer, default=0)
@@ -18,6 +19,8 @@ class GameSession(Base):
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    # Covers keyset pagination: WHERE session_id = ? AND id > ? ORDER BY id
+    __table_args__ = (Index("ix_chat_messages_session_id_id", "session_id", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("game_sessions.id"), nullable=False)
@@ -27,3 +30,28 @@ class ChatMessage(Base):
 
     session = relationship("GameSession", back_populates="messages")
 
+
+class LLMUsage(Base):
+    __tablename__ = "llm_usage"
+
+    id = Column(Integer, primary_key=True, index=True)
+    game_id = Column(String, index=True, nullable=True)
+    color = Column(String, nullable=True)  # suspect the call was for; NULL for game generation
+    key_id = Column(String, index=True, nullable=False)  # salted hash of the API key
+    purpose = Column(String, nullable=False)  # 'chat', 'events' or 'impostor'
+    model = Column(String, nullable=False)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    cached_tokens = Column(Integer, default=0)
+    total_tokens = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+class RetentionState(Base):
+    """Retention bookkeeping shared by every worker: the sweep lease and when maintenance last ran"""
+    __tablename__ = "retention_state"
+
+    name = Column(String, primary_key=True)  # 'sweep' or 'maintenance'
+    owner = Column(String, nullable=True)  # worker holding the sweep lease
+    expires_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
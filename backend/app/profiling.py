@@ -0,0 +1,163 @@
+"""
+Profiling Module
+Opt-in cProfile capture for the game init and chat request paths
+
+A request is profiled when it is picked by PROFILE_SAMPLE_RATE, or sends "X-Profile: 1"
+together with a valid X-Admin-Token.
+Requests to other paths, and unprofiled requests, pass straight through the middleware.
+cProfile only sees the event-loop thread, so work that handlers push onto worker threads
+is captured separately with profile_call() under the same trace id.
+"""
+
+import contextvars
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", Path(__file__).parent.parent / "profiles"))
+PROFILE_KEEP = 50
+PROFILE_TOP_FUNCTIONS = 40
+PROFILED_PATHS = {"/api/game/init", "/api/game/chat"}
+# Client trace ids end up in file names, so anything else gets a generated id
+TRACE_ID_PATTERN = re.compile(r"[0-9a-f-]{1,64}")
+
+_current = contextvars.ContextVar("profile_context", default=None)
+_recent = deque(maxlen=PROFILE_KEEP)
+_recent_lock = threading.Lock()
+
+
+def tag_game(game_id: str):
+    """Attach a game id to the profile being captured, if any"""
+    context = _current.get()
+    if context is not None:
+        context["game_id"] = game_id
+
+
+def is_profiling() -> bool:
+    return _current.get() is not None
+
+
+def _trace_id(headers: Dict[bytes, bytes]) -> str:
+    trace_id = headers.get(b"x-trace-id", b"").decode("latin-1")
+    return trace_id if TRACE_ID_PATTERN.fullmatch(trace_id) else uuid.uuid4().hex
+
+
+def _admin_authorized(headers: Dict[bytes, bytes]) -> bool:
+    """Same rule as require_admin: ADMIN_TOKEN must be set and match X-Admin-Token"""
+    admin_token = os.getenv("ADMIN_TOKEN")
+    return bool(admin_token) and headers.get(b"x-admin-token", b"").decode("latin-1") == admin_token
+
+
+def _save(profiler: cProfile.Profile, context: Dict, label: str, duration_ms: float):
+    """Write the profile and add it to the ring; a failure is logged and never reaches the request"""
+    try:
+        _write_profile(profiler, context, label, duration_ms)
+    except Exception as e:
+        print(f"[PROFILE] Warning: Could not save {label} profile for trace {context['trace_id']}: {e}")
+
+
+def _write_profile(profiler: cProfile.Profile, context: Dict, label: str, duration_ms: float):
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    path = PROFILE_DIR / f"{context['trace_id']}-{label}.prof"
+    profiler.dump_stats(str(path))
+
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+    entry = {
+        "trace_id": context["trace_id"],
+        "game_id": context.get("game_id"),
+        "path": context["path"],
+        "label": label,
+        "duration_ms": round(duration_ms, 1),
+        "created_at": time.time(),
+        "file": str(path),
+        "top": out.getvalue(),
+    }
+    with _recent_lock:
+        evicted = _recent[0] if len(_recent) == _recent.maxlen else None
+        _recent.append(entry)
+        # Files on disk follow the ring; a reused trace id may still point at the same file
+        stale = evicted and all(e["file"] != evicted["file"] for e in _recent)
+    if stale:
+        Path(evicted["file"]).unlink(missing_ok=True)
+    print(f"[PROFILE] Saved {label} profile for trace {context['trace_id']} ({entry['duration_ms']} ms)")
+
+
+def profile_call(label: str, fn, *args, **kwargs):
+    """Run fn under cProfile when the calling request is being profiled (use from worker threads)"""
+    context = _current.get()
+    if context is None:
+        return fn(*args, **kwargs)
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12+ allows one active profiler per interpreter
+        print(f"[PROFILE] Skipping {label} profile for trace {context['trace_id']}: another profile is running")
+        return fn(*args, **kwargs)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        profiler.disable()
+        _save(profiler, context, label, (time.perf_counter() - started) * 1000)
+
+
+def recent_profiles(trace_id: Optional[str] = None) -> List[Dict]:
+    with _recent_lock:
+        entries = list(_recent)
+    if trace_id:
+        return [e for e in entries if e["trace_id"] == trace_id]
+    return [{k: v for k, v in e.items() if k != "top"} for e in reversed(entries)]
+
+
+class ProfilingMiddleware:
+    """ASGI middleware; unprofiled requests cost a path lookup and, for profiled paths, a header scan"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in PROFILED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        requested = headers.get(b"x-profile", b"").lower() in (b"1", b"true", b"yes") and _admin_authorized(headers)
+        if not requested and not (PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE):
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = _trace_id(headers)
+        context = {"trace_id": trace_id, "path": scope["path"], "game_id": None}
+        token = _current.set(context)
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", trace_id.encode("latin-1"))]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            profiler.enable()
+        except ValueError:
+            _current.reset(token)
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            profiler.disable()
+            _current.reset(token)
+            _save(profiler, context, "request", (time.perf_counter() - started) * 1000)
@@ -0,0 +1,289 @@
+"""
+Retention Module
+Purges finished and abandoned games from the database, archiving them first,
+and keeps the SQLite file compact and its query latency tracked over time
+"""
+
+import datetime
+import gzip
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, func, or_, text
+from sqlalchemy.exc import IntegrityError
+
+from app.database import SessionLocal, engine
+from app.models import GameSession, ChatMessage, RetentionState
+from app.snapshot import write_snapshot
+
+RETENTION_ENABLED = os.getenv("RETENTION_ENABLED", "1").lower() in ("1", "true", "yes")
+# Games with no activity for this long are abandoned; finished games (a verdict was made) go sooner
+GAME_TTL_HOURS = float(os.getenv("GAME_TTL_HOURS", "24"))
+FINISHED_GAME_TTL_HOURS = float(os.getenv("FINISHED_GAME_TTL_HOURS", "1"))
+RETENTION_INTERVAL_SECONDS = int(os.getenv("RETENTION_INTERVAL_SECONDS", "900"))
+MAINTENANCE_INTERVAL_HOURS = float(os.getenv("MAINTENANCE_INTERVAL_HOURS", "24"))
+# Rows deleted per transaction, and games purged per sweep, so the writer lock is never held long
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "500"))
+RETENTION_MAX_GAMES_PER_SWEEP = int(os.getenv("RETENTION_MAX_GAMES_PER_SWEEP", "200"))
+# Only the worker holding the sweep lease sweeps; the lease lapses after this long if its holder dies mid-sweep
+SWEEP_LEASE_SECONDS = int(os.getenv("RETENTION_LEASE_SECONDS", "3600"))
+
+ARCHIVE_ENABLED = os.getenv("RETENTION_ARCHIVE", "1").lower() in ("1", "true", "yes")
+ARCHIVE_DIR = Path(os.getenv("ARCHIVE_DIR", Path(__file__).parent.parent / "archive"))
+# One storage sample per sweep; 96 covers a day at the default interval
+STORAGE_HISTORY = 96
+
+SNAPSHOT_KEYS = ("all_events", "player_events", "impostor_data", "impostor_color", "impostor_colors", "players")
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+class RetentionManager:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.history = deque(maxlen=STORAGE_HISTORY)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.stats = {
+            "games_purged": 0,
+            "sessions_deleted": 0,
+            "messages_deleted": 0,
+            "games_archived": 0,
+            "last_sweep_at": None,
+            "last_maintenance_at": None,
+            "last_maintenance_ms": None,
+        }
+
+    def expired_games(self, game_states: Dict[str, Dict], now: Optional[float] = None) -> List[str]:
+        """In-memory games past their TTL: finished ones after FINISHED_GAME_TTL_HOURS, idle ones after GAME_TTL_HOURS"""
+        now = now or time.time()
+        expired = []
+        for game_id, game_state in list(game_states.items()):
+            finished_at = game_state.get("finished_at")
+            if finished_at and now - finished_at > FINISHED_GAME_TTL_HOURS * 3600:
+                expired.append(game_id)
+            elif now - game_state.get("last_activity", now) > GAME_TTL_HOURS * 3600:
+                expired.append(game_id)
+        return expired
+
+    def stale_db_games(self, active_game_ids: Iterable[str]) -> List[str]:
+        """
+        Games in the database with no message or session activity within GAME_TTL_HOURS.
+        Sessions from before game_id was stored are grouped on their own session_id.
+        """
+        cutoff = _utcnow() - datetime.timedelta(hours=GAME_TTL_HOURS)
+        db = SessionLocal()
+        try:
+            last_message = db.query(
+                ChatMessage.session_id.label("session_pk"),
+                func.max(ChatMessage.timestamp).label("last_at"),
+            ).group_by(ChatMessage.session_id).subquery()
+            game_key = func.coalesce(GameSession.game_id, GameSession.session_id)
+            last_activity = func.max(func.coalesce(last_message.c.last_at, GameSession.created_at))
+            rows = db.query(game_key).outerjoin(
+                last_message, last_message.c.session_pk == GameSession.id
+            ).group_by(game_key).having(last_activity < cutoff).limit(
+                RETENTION_MAX_GAMES_PER_SWEEP + len(active_game_ids)
+            ).all()
+        finally:
+            db.close()
+        active = set(active_game_ids)
+        return [key for key, in rows if key not in active][:RETENTION_MAX_GAMES_PER_SWEEP]
+
+    def _archive(self, db, game_id: str, sessions: List[GameSession], game_state: Optional[Dict]):
+        """Append the game's transcripts to today's JSONL archive, plus a snapshot of its events if still in memory"""
+        ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+        record = {"game_id": game_id, "archived_at": _utcnow().isoformat(), "sessions": []}
+        for session in sessions:
+            messages = db.query(ChatMessage).filter(ChatMessage.session_id == session.id).order_by(ChatMessage.id)
+            record["sessions"].append({
+                "session_id": session.session_id,
+                "scenario": session.scenario,
+                "created_at": session.created_at.isoformat() if session.created_at else None,
+                "messages": [
+                    {
+                        "role": msg.role,
+                        "content": msg.content,
+                        "timestamp": msg.timestamp.isoformat() if msg.timestamp else None
+                    }
+                    for msg in messages.yield_per(RETENTION_BATCH_SIZE)
+                ],
+            })
+
+        # Concatenated gzip members form a valid gzip stream, so appending is safe
+        path = ARCHIVE_DIR / f"games-{_utcnow():%Y%m%d}.jsonl.gz"
+        with self._lock, gzip.open(path, "at", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+        if game_state and game_state.get("all_events"):
+            write_snapshot(str(ARCHIVE_DIR / f"{game_id}.snap"), {key: game_state.get(key) for key in SNAPSHOT_KEYS})
+
+    def purge_game(self, game_id: str, game_state: Optional[Dict] = None) -> Dict[str, int]:
+        """Archive a game, then delete its messages and sessions in batched transactions"""
+        db = SessionLocal()
+        try:
+            sessions = db.query(GameSession).filter(or_(
+                GameSession.game_id == game_id,
+                and_(GameSession.game_id.is_(None), GameSession.session_id == game_id),
+            )).all()
+            if not sessions:
+                return {"sessions": 0, "messages": 0}
+            if ARCHIVE_ENABLED:
+                self._archive(db, game_id, sessions, game_state)
+
+            session_pks = [session.id for session in sessions]
+            messages_deleted = 0
+            while True:
+                ids = [row.id for row in db.query(ChatMessage.id).filter(
+                    ChatMessage.session_id.in_(session_pks)
+                ).limit(RETENTION_BATCH_SIZE)]
+                if not ids:
+                    break
+                messages_deleted += db.query(ChatMessage).filter(ChatMessage.id.in_(ids)).delete(synchronize_session=False)
+                db.commit()
+            for chunk in _chunks(session_pks, RETENTION_BATCH_SIZE):
+                db.query(GameSession).filter(GameSession.id.in_(chunk)).delete(synchronize_session=False)
+                db.commit()
+        finally:
+            db.close()
+
+        with self._lock:
+            self.stats["games_purged"] += 1
+            self.stats["sessions_deleted"] += len(session_pks)
+            self.stats["messages_deleted"] += messages_deleted
+            self.stats["games_archived"] += 1 if ARCHIVE_ENABLED else 0
+        return {"sessions": len(session_pks), "messages": messages_deleted}
+
+    def maintain(self):
+        """ANALYZE to refresh planner statistics, then VACUUM (SQLite only) to give freed pages back"""
+        started = time.perf_counter()
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("ANALYZE"))
+            if engine.dialect.name == "sqlite":
+                conn.execute(text("VACUUM"))
+        completed_at = _utcnow()
+        db = SessionLocal()
+        try:
+            db.merge(RetentionState(name="maintenance", completed_at=completed_at))
+            db.commit()
+        finally:
+            db.close()
+        with self._lock:
+            self.stats["last_maintenance_at"] = time.time()
+            self.stats["last_maintenance_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    def maintenance_due(self) -> bool:
+        """Maintenance is due when no worker has completed it within MAINTENANCE_INTERVAL_HOURS"""
+        db = SessionLocal()
+        try:
+            state = db.get(RetentionState, "maintenance")
+        finally:
+            db.close()
+        if state is None or state.completed_at is None:
+            return True
+        return _utcnow() - state.completed_at > datetime.timedelta(hours=MAINTENANCE_INTERVAL_HOURS)
+
+    def acquire_sweep(self) -> bool:
+        """Take the cross-worker sweep lease; False if another worker holds an unexpired one"""
+        now = _utcnow()
+        db = SessionLocal()
+        try:
+            if db.get(RetentionState, "sweep") is None:
+                try:
+                    db.add(RetentionState(name="sweep"))
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()
+            # A single conditional UPDATE, so two workers cannot both take the lease
+            taken = db.query(RetentionState).filter(
+                RetentionState.name == "sweep",
+                or_(RetentionState.owner.is_(None), RetentionState.expires_at < now),
+            ).update({
+                "owner": self.owner,
+                "expires_at": now + datetime.timedelta(seconds=SWEEP_LEASE_SECONDS),
+            }, synchronize_session=False)
+            db.commit()
+            return taken == 1
+        finally:
+            db.close()
+
+    def release_sweep(self):
+        db = SessionLocal()
+        try:
+            db.query(RetentionState).filter(
+                RetentionState.name == "sweep", RetentionState.owner == self.owner
+            ).update({"owner": None, "expires_at": None}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def sample(self) -> Dict:
+        """Record the database size, row counts and the latency of a history-page query"""
+        db = SessionLocal()
+        try:
+            sample = {"at": time.time(), "db_bytes": None, "free_bytes": None}
+            if engine.dialect.name == "sqlite":
+                page_size = db.execute(text("PRAGMA page_size")).scalar()
+                sample["db_bytes"] = db.execute(text("PRAGMA page_count")).scalar() * page_size
+                sample["free_bytes"] = db.execute(text("PRAGMA freelist_count")).scalar() * page_size
+            sample["sessions"] = db.query(func.count(GameSession.id)).scalar()
+            sample["messages"] = db.query(func.count(ChatMessage.id)).scalar()
+
+            # Same shape as get_chat_messages_page on the newest session
+            newest = db.query(func.max(GameSession.id)).scalar()
+            started = time.perf_counter()
+            db.query(ChatMessage).filter(ChatMessage.session_id == newest).order_by(ChatMessage.id).limit(51).all()
+            sample["history_query_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        finally:
+            db.close()
+        with self._lock:
+            self.history.append(sample)
+        return sample
+
+    def sweep_database(self, active_game_ids: Iterable[str], force_maintenance: bool = False) -> Dict:
+        """Purge stale games that are no longer in memory, run maintenance when due, and take a storage sample"""
+        active_game_ids = list(active_game_ids)
+        purged = 0
+        for game_id in self.stale_db_games(active_game_ids):
+            self.purge_game(game_id)
+            purged += 1
+
+        if force_maintenance or self.maintenance_due():
+            self.maintain()
+
+        with self._lock:
+            self.stats["last_sweep_at"] = time.time()
+        return {"purged": purged, "sample": self.sample()}
+
+    def report(self) -> Dict:
+        with self._lock:
+            return {
+                "config": {
+                    "enabled": RETENTION_ENABLED,
+                    "game_ttl_hours": GAME_TTL_HOURS,
+                    "finished_game_ttl_hours": FINISHED_GAME_TTL_HOURS,
+                    "interval_seconds": RETENTION_INTERVAL_SECONDS,
+                    "maintenance_interval_hours": MAINTENANCE_INTERVAL_HOURS,
+                    "worker": self.owner,
+                    "archive": str(ARCHIVE_DIR) if ARCHIVE_ENABLED else None,
+                },
+                "stats": dict(self.stats),
+                "latest": self.history[-1] if self.history else None,
+                "history": list(self.history),
+            }
+
+
+retention = RetentionManager()
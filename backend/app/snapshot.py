@@ -0,0 +1,332 @@
+"""
+Game Snapshot Module
+Compact binary codec for the output of generate_game_data
+
+Layout (little-endian, every section 4-byte aligned):
+    header      magic, version, section counts and offsets
+    meta        zlib-compressed JSON: interned players/locations, roster, every other
+                top-level field (impostor data, player colours, ...), and overrides for
+                anything the columns cannot hold: non-integer ids and times, missing or
+                extra keys, player_events that differ from the ones derived from all_events
+    columns     period_times   int32[n_periods]        (0 when overridden in meta)
+                period_starts  uint32[n_periods + 1]   (index into the event columns)
+                event_ids      int32[n_events]         (-1 when the LLM gave no usable id)
+                event_location int32[n_events]         (index into locations, -1 if none)
+                player_starts  uint32[n_events + 1]    (index into event_players)
+                event_players  uint32[n_links]         (index into players)
+                desc_offsets   uint32[n_events + 1]    (byte offsets into the text blob)
+    text        zlib-compressed UTF-8 descriptions, concatenated
+
+Columns are exposed as memoryviews over the underlying buffer, so a snapshot opened
+with open_snapshot() is read straight out of the memory map without copying.
+Only the description text has to be inflated, and that happens lazily.
+Decoding gives back exactly the dict that was encoded, as far as JSON can represent it.
+"""
+
+import json
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from typing import Dict, List, Optional
+
+from app.event_generator import build_player_events, find_locations
+
+MAGIC = b"IMPS"
+VERSION = 3
+# Version 2 files have no overrides and decode the same way
+READABLE_VERSIONS = (2, 3)
+
+# magic, version, n_players, n_locations, n_periods, n_events, n_links, meta_len, text_len
+_HEADER = struct.Struct("<4sHxxIIIIIII")
+
+_NATIVE_LITTLE = sys.byteorder == "little"
+
+EVENT_KEYS = ("event_id", "description", "players")
+PERIOD_KEYS = ("time", "events")
+INT32_MAX = 2 ** 31 - 1
+
+
+def _align(offset: int) -> int:
+    return (offset + 3) & ~3
+
+
+def _is_int32(value, minimum: int = -INT32_MAX - 1) -> bool:
+    return type(value) is int and minimum <= value <= INT32_MAX
+
+
+def _override(item: Dict, keys: tuple, values: Dict) -> Optional[Dict]:
+    """What decoding needs to restore item: values the columns could not hold, extra keys, absent keys"""
+    values = dict(values, **{k: v for k, v in item.items() if k not in keys})
+    missing = [k for k in keys if k not in item]
+    if not values and not missing:
+        return None
+    override = {}
+    if values:
+        override["values"] = values
+    if missing:
+        override["missing"] = missing
+    return override
+
+
+def _apply_override(item: Dict, override: Optional[Dict]) -> Dict:
+    if override:
+        for key in override.get("missing", []):
+            item.pop(key, None)
+        item.update(override.get("values", {}))
+    return item
+
+
+def encode_snapshot(game_data: Dict) -> bytes:
+    """Encode generate_game_data() output into the compact snapshot format"""
+    players: List[str] = []
+    player_index: Dict[str, int] = {}
+    locations: List[str] = []
+    location_index: Dict[str, int] = {}
+
+    def intern_player(name: str) -> int:
+        if name not in player_index:
+            player_index[name] = len(players)
+            players.append(name)
+        return player_index[name]
+
+    def intern_location(name: str) -> int:
+        if name not in location_index:
+            location_index[name] = len(locations)
+            locations.append(name)
+        return location_index[name]
+
+    roster = list(game_data.get("player_events", {}).keys())
+    for name in roster:
+        intern_player(name)
+    period_overrides: Dict[int, Dict] = {}
+    event_overrides: Dict[int, Dict] = {}
+
+    period_times = array("i")
+    period_starts = array("I", [0])
+    event_ids = array("i")
+    event_location = array("i")
+    player_starts = array("I", [0])
+    event_players = array("I")
+    desc_offsets = array("I", [0])
+    text = bytearray()
+
+    for p, period in enumerate(game_data.get("all_events", [])):
+        if not isinstance(period, dict):
+            raise ValueError(f"Period {p} is not an object")
+        time, events = period.get("time"), period.get("events", [])
+        values = {}
+        if not _is_int32(time) and "time" in period:
+            values["time"] = time
+        if not isinstance(events, list):
+            values["events"], events = events, []
+        override = _override(period, PERIOD_KEYS, values)
+        if override:
+            period_overrides[p] = override
+        period_times.append(time if _is_int32(time) else 0)
+
+        for event in events:
+            if not isinstance(event, dict):
+                raise ValueError(f"Event in period {p} is not an object")
+            event_id, description, names = event.get("event_id"), event.get("description"), event.get("players")
+            values = {}
+            # -1 in the column means None; anything else that is not a non-negative int32 goes to meta
+            if event_id is not None and not _is_int32(event_id, 0):
+                values["event_id"] = event_id
+            if not isinstance(description, str):
+                if "description" in event:
+                    values["description"] = description
+                description = ""
+            if not (isinstance(names, list) and all(isinstance(name, str) for name in names)):
+                if "players" in event:
+                    values["players"] = names
+                names = []
+            override = _override(event, EVENT_KEYS, values)
+            if override:
+                event_overrides[len(event_ids)] = override
+
+            event_ids.append(event_id if _is_int32(event_id, 0) else -1)
+            # Same whole-word matcher as the timeline indexes; the column keeps the first location
+            location = next(iter(find_locations(description)), None)
+            event_location.append(intern_location(location) if location else -1)
+            for name in names:
+                event_players.append(intern_player(name))
+            player_starts.append(len(event_players))
+            text += description.encode("utf-8")
+            desc_offsets.append(len(text))
+        period_starts.append(len(event_ids))
+
+    impostor_data = game_data.get("impostor_data", {})
+    for murder in impostor_data.get("murder_events") or [impostor_data.get("murder_event", {})]:
+        if murder.get("location"):
+            intern_location(murder["location"])
+
+    meta = {
+        "players": players,
+        "locations": locations,
+        "roster": roster,
+        "fields": {k: v for k, v in game_data.items() if k not in ("all_events", "player_events")},
+    }
+    if period_overrides:
+        meta["period_overrides"] = period_overrides
+    if event_overrides:
+        meta["event_overrides"] = event_overrides
+    absent = [k for k in ("all_events", "player_events") if k not in game_data]
+    if absent:
+        meta["absent"] = absent
+    # player_events is normally derived from all_events; keep it verbatim only when it is not
+    if game_data.get("player_events", {}) != build_player_events(game_data.get("all_events", []), roster):
+        meta["player_events"] = game_data["player_events"]
+    meta = zlib.compress(json.dumps(meta, separators=(",", ":")).encode("utf-8"), 9)
+    text_blob = zlib.compress(bytes(text), 9)
+
+    columns = [period_times, period_starts, event_ids, event_location,
+               player_starts, event_players, desc_offsets]
+    if not _NATIVE_LITTLE:
+        for column in columns:
+            column.byteswap()
+
+    out = bytearray(_HEADER.pack(
+        MAGIC, VERSION, len(players), len(locations), len(period_times),
+        len(event_ids), len(event_players), len(meta), len(text_blob)
+    ))
+    out += meta
+    for column in columns:
+        out += b"\0" * (_align(len(out)) - len(out))
+        out += column.tobytes()
+    out += text_blob
+    return bytes(out)
+
+
+class SnapshotView:
+    """Read-only view over an encoded snapshot (bytes, bytearray or mmap)"""
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        view = memoryview(buffer)
+        (magic, version, n_players, n_locations, n_periods,
+         n_events, n_links, meta_len, text_len) = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a game snapshot")
+        if version not in READABLE_VERSIONS:
+            raise ValueError(f"Unsupported snapshot version {version}")
+
+        offset = _HEADER.size
+        meta = json.loads(zlib.decompress(view[offset:offset + meta_len]))
+        offset += meta_len
+
+        self.players: List[str] = meta["players"]
+        self.locations: List[str] = meta["locations"]
+        self.roster: List[str] = meta["roster"]
+        self.fields: Dict = meta["fields"]
+        # JSON object keys are strings
+        self.period_overrides = {int(k): v for k, v in meta.get("period_overrides", {}).items()}
+        self.event_overrides = {int(k): v for k, v in meta.get("event_overrides", {}).items()}
+        self.absent: List[str] = meta.get("absent", [])
+        self._player_events: Optional[Dict] = meta.get("player_events")
+        self.num_periods = n_periods
+        self.num_events = n_events
+
+        def column(fmt: str, length: int):
+            nonlocal offset
+            offset = _align(offset)
+            raw = view[offset:offset + length * 4]
+            offset += length * 4
+            if _NATIVE_LITTLE:
+                return raw.cast(fmt)
+            swapped = array(fmt, raw.tobytes())
+            swapped.byteswap()
+            return swapped
+
+        self.period_times = column("i", n_periods)
+        self.period_starts = column("I", n_periods + 1)
+        self.event_ids = column("i", n_events)
+        self.event_location = column("i", n_events)
+        self.player_starts = column("I", n_events + 1)
+        self.event_players = column("I", n_links)
+        self.desc_offsets = column("I", n_events + 1)
+        self._text_view = view[offset:offset + text_len]
+        self._text: Optional[bytes] = None
+
+    def _descriptions(self) -> bytes:
+        if self._text is None:
+            self._text = zlib.decompress(self._text_view)
+        return self._text
+
+    def description(self, i: int) -> str:
+        text = self._descriptions()
+        return text[self.desc_offsets[i]:self.desc_offsets[i + 1]].decode("utf-8")
+
+    def event_player_names(self, i: int) -> List[str]:
+        start, end = self.player_starts[i], self.player_starts[i + 1]
+        return [self.players[idx] for idx in self.event_players[start:end]]
+
+    def location(self, i: int) -> Optional[str]:
+        idx = self.event_location[i]
+        return self.locations[idx] if idx >= 0 else None
+
+    def _event_dict(self, i: int) -> Dict:
+        event_id = self.event_ids[i]
+        return _apply_override({
+            "event_id": event_id if event_id >= 0 else None,
+            "description": self.description(i),
+            "players": self.event_player_names(i),
+        }, self.event_overrides.get(i))
+
+    def all_events(self) -> List[Dict]:
+        periods = []
+        for p in range(self.num_periods):
+            start, end = self.period_starts[p], self.period_starts[p + 1]
+            periods.append(_apply_override({
+                "time": self.period_times[p],
+                "events": [self._event_dict(i) for i in range(start, end)],
+            }, self.period_overrides.get(p)))
+        return periods
+
+    def player_events(self) -> Dict[str, List[Dict]]:
+        """Per-player events, rebuilt from the event columns unless stored verbatim"""
+        if self._player_events is not None:
+            return self._player_events
+        return build_player_events(self.all_events(), self.roster)
+
+    def to_game_data(self) -> Dict:
+        """Materialise the snapshot back into the generate_game_data() shape"""
+        all_events = self.all_events()
+        player_events = self._player_events
+        if player_events is None:
+            player_events = build_player_events(all_events, self.roster)
+        game_data = {"all_events": all_events, "player_events": player_events, **self.fields}
+        for key in self.absent:
+            del game_data[key]
+        return game_data
+
+    def release(self):
+        """Drop every view into the buffer so an underlying mmap can be closed"""
+        for name in ("period_times", "period_starts", "event_ids", "event_location",
+                     "player_starts", "event_players", "desc_offsets", "_text_view"):
+            value = getattr(self, name)
+            if isinstance(value, memoryview):
+                value.release()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+
+def decode_snapshot(data: bytes) -> Dict:
+    """Decode snapshot bytes into the generate_game_data() shape"""
+    return SnapshotView(data).to_game_data()
+
+
+def write_snapshot(path: str, game_data: Dict) -> int:
+    """Write a snapshot file and return its size in bytes"""
+    data = encode_snapshot(game_data)
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+def open_snapshot(path: str) -> SnapshotView:
+    """Memory-map a snapshot file; columns are read from the map without copying"""
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return SnapshotView(mapped)
@@ -0,0 +1,209 @@
+"""
+Timeline Question Answering Module
+Answers direct time/location/companion questions straight from a suspect's event history
+(a crewmate's observations, the impostor's cover story), so every suspect answers them alike
+"""
+
+import re
+import threading
+from typing import Dict, List, Optional
+
+from app.event_generator import ALL_PLAYER_COLORS, COLOR_TO_PLAYER, LOCATION_PATTERNS, find_locations
+
+# Questions touching these topics need judgement, so they always go to the LLM
+LLM_ONLY_WORDS = {
+    "why", "how", "murder", "kill", "killed", "body", "dead", "impostor", "imposter",
+    "suspicious", "sus", "lie", "lying", "think", "suspect", "vent", "trust", "believe",
+}
+# Relative or ranged times are not a single-period lookup
+QUALIFIER_WORDS = {"before", "after", "between", "until", "till", "since"}
+# Each question word is a separate intent; two of them make a compound question
+INTENT_WORDS = {"where", "who", "what", "when"}
+
+TIME_PATTERN = re.compile(r"(?:\b(?:time|period|timestamp|t)\s*#?\s*|\bat\s+)(\d+)\b")
+PLAYER_PATTERN = re.compile(r"\bplayer\s*(\d+)\b")
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+SENTENCE_END_PATTERN = re.compile(r"[.!?]+")
+
+qa_stats = {"local": 0, "llm": 0}
+_stats_lock = threading.Lock()
+
+
+class PlayerTimeline:
+    """Per-player indexes over their events, built once per game"""
+
+    def __init__(self, player_name: str, events: List[Dict], roster: Optional[List[str]] = None):
+        self.player_name = player_name
+        # Players in this game; colour words for anyone else are ordinary words
+        self.roster = set(roster or ALL_PLAYER_COLORS)
+        self.by_time: Dict[int, List[Dict]] = {}
+        self.locations_by_time: Dict[int, List[str]] = {}
+        self.companions_by_time: Dict[int, List[str]] = {}
+        self.times_by_location: Dict[str, List[int]] = {}
+        self.times_with_player: Dict[str, List[int]] = {}
+
+        for event in events:
+            time = event.get("time")
+            if not isinstance(time, int):
+                continue
+            self.by_time.setdefault(time, []).append(event)
+
+            # "walked from Admin to Electrical" places the player in both at that time
+            for location in find_locations(event.get("description", "")):
+                _append_unique(self.locations_by_time.setdefault(time, []), location)
+                _append_unique(self.times_by_location.setdefault(location, []), time)
+
+            for other in event.get("players") or []:
+                if other != player_name:
+                    _append_unique(self.companions_by_time.setdefault(time, []), other)
+                    _append_unique(self.times_with_player.setdefault(other, []), time)
+
+
+def _append_unique(items: List, value):
+    if value not in items:
+        items.append(value)
+
+
+def _display(player_name: str) -> str:
+    color = ALL_PLAYER_COLORS.get(player_name)
+    return f"{player_name} ({color})" if color else player_name
+
+
+def _join(items: List[str]) -> str:
+    if len(items) <= 1:
+        return "".join(items)
+    return ", ".join(items[:-1]) + " and " + items[-1]
+
+
+def _times(times: List[int]) -> str:
+    return _join([str(t) for t in sorted(times)])
+
+
+def parse_question(message: str, self_name: str, roster: Optional[set] = None) -> Optional[Dict]:
+    """
+    Parse a question into an intent and slots.
+    Returns None if the question is not a plain timeline lookup, including anything
+    a single template would only half answer (several sentences or intents).
+    """
+    text = message.lower()
+    if sum(1 for part in SENTENCE_END_PATTERN.split(text) if part.strip()) > 1:
+        return None
+    words = set(WORD_PATTERN.findall(text))
+    if words & (LLM_ONLY_WORDS | QUALIFIER_WORDS) or len(words & INTENT_WORDS) > 1:
+        return None
+
+    times = [int(t) for t in TIME_PATTERN.findall(text)]
+    if len(times) > 1:
+        return None
+    time = times[0] if times else None
+
+    # Any number left over ("at time 3 and 4", "the last 2 rounds") means more than one period
+    residue = PLAYER_PATTERN.sub(" ", TIME_PATTERN.sub(" ", text))
+    for _, pattern in LOCATION_PATTERNS:
+        residue = pattern.sub(" ", residue)
+    if any(c.isdigit() for c in residue):
+        return None
+
+    locations = find_locations(text)
+    if len(locations) > 1:
+        return None
+    location = locations[0] if locations else None
+
+    players = [f"Player{n}" for n in PLAYER_PATTERN.findall(text)]
+    players += [COLOR_TO_PLAYER[color] for color in COLOR_TO_PLAYER if color in words]
+    players = [p for p in dict.fromkeys(players) if p != self_name and (roster is None or p in roster)]
+    if len(players) > 1:
+        return None
+    player = players[0] if players else None
+
+    asks_saw = bool(words & {"see", "saw", "seen", "meet", "met", "with", "encounter", "cross"})
+
+    # saw_player has no location slot, so "did you see blue in Reactor" would lose it
+    if player and location:
+        return None
+    if player and asks_saw:
+        return {"intent": "saw_player", "player": player, "time": time}
+    if player:
+        return None
+    if time is not None and location and words & {"were", "was"}:
+        return {"intent": "at_location_at_time", "location": location, "time": time}
+    if time is not None and "who" in words and asks_saw:
+        return {"intent": "who_with", "time": time}
+    if time is not None and "where" in words:
+        return {"intent": "where", "time": time}
+    if time is not None and "what" in words and words & {"doing", "do", "did", "happened", "happen"}:
+        return {"intent": "what_doing", "time": time}
+    if time is None and location and words & {"when", "ever"}:
+        return {"intent": "when_at_location", "location": location}
+    return None
+
+
+def answer_question(timeline: PlayerTimeline, parsed: Dict) -> str:
+    intent = parsed["intent"]
+    time = parsed.get("time")
+
+    if intent == "where":
+        locations = timeline.locations_by_time.get(time)
+        if locations:
+            return f"At time {time} I was in {_join(locations)}."
+        if time in timeline.by_time:
+            return f"At time {time}: {timeline.by_time[time][0].get('description', '')}"
+        return f"I don't have anything recorded for time {time}, so I can't say for sure where I was."
+
+    if intent == "who_with":
+        companions = timeline.companions_by_time.get(time)
+        if companions:
+            return f"At time {time} I was with {_join([_display(p) for p in companions])}."
+        if time in timeline.by_time:
+            return f"At time {time} I didn't cross paths with anyone."
+        return f"I don't have anything recorded for time {time}, so I can't say who I saw."
+
+    if intent == "what_doing":
+        events = timeline.by_time.get(time)
+        if events:
+            return f"At time {time}: " + " ".join(e.get("description", "") for e in events)
+        return f"I don't have anything recorded for time {time}."
+
+    if intent == "at_location_at_time":
+        location = parsed["location"]
+        locations = timeline.locations_by_time.get(time, [])
+        if location in locations:
+            return f"Yes, I was in {location} at time {time}."
+        if locations:
+            return f"No, at time {time} I was in {_join(locations)}, not {location}."
+        return f"I don't have anything recorded placing me in {location} at time {time}."
+
+    if intent == "when_at_location":
+        location = parsed["location"]
+        times = timeline.times_by_location.get(location)
+        if times:
+            return f"I was in {location} at time {_times(times)}."
+        return f"I don't remember being in {location} at any point."
+
+    if intent == "saw_player":
+        player = parsed["player"]
+        times = timeline.times_with_player.get(player, [])
+        if time is not None:
+            if time in times:
+                return f"Yes, I was with {_display(player)} at time {time}."
+            return f"No, I didn't see {_display(player)} at time {time}."
+        if times:
+            return f"I was with {_display(player)} at time {_times(times)}."
+        return f"I didn't cross paths with {_display(player)}."
+
+    raise ValueError(f"Unknown intent {intent}")
+
+
+def answer_locally(timeline: PlayerTimeline, message: str) -> Optional[str]:
+    """Answer a question from a suspect's timeline, or None to fall through to the LLM"""
+    parsed = parse_question(message, timeline.player_name, timeline.roster)
+    answer = answer_question(timeline, parsed) if parsed else None
+    with _stats_lock:
+        qa_stats["local" if answer else "llm"] += 1
+    return answer
+
+
+def get_qa_stats() -> Dict:
+    with _stats_lock:
+        total = qa_stats["local"] + qa_stats["llm"]
+        return {**qa_stats, "local_fraction": round(qa_stats["local"] / total, 3) if total else None}
@@ -0,0 +1,206 @@
+"""
+Usage Ledger Module
+Records token usage for every OpenAI call and enforces per-game and per-key budgets
+"""
+
+import datetime
+import os
+import threading
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+
+from app.database import SessionLocal
+from app.key_cache import key_cache
+from app.models import LLMUsage
+
+# Token budgets; 0 disables the limit. Key budgets reset every UTC day.
+GAME_TOKEN_BUDGET = int(os.getenv("GAME_TOKEN_BUDGET", "150000"))
+KEY_TOKEN_BUDGET = int(os.getenv("KEY_TOKEN_BUDGET", "0"))
+
+# Model used once the remaining budget drops into the last quarter
+FALLBACK_MODEL = os.getenv("FALLBACK_MODEL", "gpt-4.1-mini")
+MIN_MAX_TOKENS = 64
+
+
+class BudgetExceeded(Exception):
+    """Raised when a game or API key has no token budget left"""
+
+
+def _usage_counts(usage) -> Dict[str, int]:
+    """Pull token counts out of a response.usage object (or dict)"""
+    def field(obj, name):
+        if obj is None:
+            return None
+        return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+    details = field(usage, "prompt_tokens_details")
+    prompt_tokens = field(usage, "prompt_tokens") or 0
+    completion_tokens = field(usage, "completion_tokens") or 0
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cached_tokens": field(details, "cached_tokens") or 0,
+        "total_tokens": field(usage, "total_tokens") or prompt_tokens + completion_tokens,
+    }
+
+
+class UsageLedger:
+    def __init__(self, game_budget: int = GAME_TOKEN_BUDGET, key_budget: int = KEY_TOKEN_BUDGET):
+        self.game_budget = game_budget
+        self.key_budget = key_budget
+        self._lock = threading.Lock()
+        self._game_totals: Dict[str, int] = {}
+        self._key_totals: Dict[tuple, int] = {}
+
+    def _key_total(self, key_id: str) -> int:
+        """Tokens spent by a key today, loaded from the ledger table on first use"""
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        slot = (key_id, today)
+        with self._lock:
+            if slot in self._key_totals:
+                return self._key_totals[slot]
+
+        start = datetime.datetime.combine(today, datetime.time.min)
+        db = SessionLocal()
+        try:
+            spent = db.query(func.coalesce(func.sum(LLMUsage.total_tokens), 0)).filter(
+                LLMUsage.key_id == key_id,
+                LLMUsage.created_at >= start
+            ).scalar()
+        finally:
+            db.close()
+
+        with self._lock:
+            return self._key_totals.setdefault(slot, int(spent))
+
+    def remaining_fraction(self, game_id: Optional[str], key_id: str) -> float:
+        fractions = [1.0]
+        if self.game_budget and game_id:
+            with self._lock:
+                spent = self._game_totals.get(game_id, 0)
+            fractions.append(1 - spent / self.game_budget)
+        if self.key_budget:
+            fractions.append(1 - self._key_total(key_id) / self.key_budget)
+        return min(fractions)
+
+    def plan(
+        self,
+        api_key: str,
+        game_id: Optional[str],
+        model: str,
+        max_tokens: int,
+        history_limit: int = 10,
+        shrink_output: bool = True
+    ) -> Dict:
+        """
+        Decide how a call should run given the budget left:
+            > 50% left   as requested
+            25-50% left  half max_tokens, shorter chat history
+            < 25% left   fallback model, quarter max_tokens, minimal history
+            none left    BudgetExceeded
+        Calls whose output must be complete JSON pass shrink_output=False: they keep max_tokens
+        and only move to the fallback model, since a truncated reply cannot be parsed.
+        """
+        remaining = self.remaining_fraction(game_id, key_cache.digest(api_key))
+        if remaining <= 0:
+            raise BudgetExceeded("Token budget exhausted for this game or API key")
+        if remaining > 0.5:
+            return {"model": model, "max_tokens": max_tokens, "history_limit": history_limit}
+        if remaining > 0.25:
+            return {
+                "model": model,
+                "max_tokens": max(MIN_MAX_TOKENS, max_tokens // 2) if shrink_output else max_tokens,
+                "history_limit": min(history_limit, 4),
+            }
+        return {
+            "model": FALLBACK_MODEL,
+            "max_tokens": max(MIN_MAX_TOKENS, max_tokens // 4) if shrink_output else max_tokens,
+            "history_limit": min(history_limit, 2),
+        }
+
+    def record(
+        self,
+        api_key: str,
+        game_id: Optional[str],
+        color: Optional[str],
+        purpose: str,
+        model: str,
+        usage
+    ) -> Dict[str, int]:
+        """Add one call's usage to the running totals and the ledger table"""
+        counts = _usage_counts(usage)
+        key_id = key_cache.digest(api_key)
+        self._key_total(key_id)
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        with self._lock:
+            if game_id:
+                self._game_totals[game_id] = self._game_totals.get(game_id, 0) + counts["total_tokens"]
+            self._key_totals[(key_id, today)] = self._key_totals.get((key_id, today), 0) + counts["total_tokens"]
+
+        db = SessionLocal()
+        try:
+            db.add(LLMUsage(game_id=game_id, color=color, key_id=key_id, purpose=purpose, model=model, **counts))
+            db.commit()
+        except Exception as e:
+            print(f"[USAGE] Warning: Could not record usage: {e}")
+        finally:
+            db.close()
+        return counts
+
+    def forget_game(self, game_id: str):
+        with self._lock:
+            self._game_totals.pop(game_id, None)
+
+    def summary(self, game_id: Optional[str] = None, key_id: Optional[str] = None) -> Dict:
+        """Token totals from the ledger table, grouped by game, suspect, purpose and model"""
+        db = SessionLocal()
+        try:
+            query = db.query(
+                LLMUsage.game_id,
+                LLMUsage.color,
+                LLMUsage.purpose,
+                LLMUsage.model,
+                func.count(LLMUsage.id),
+                func.sum(LLMUsage.prompt_tokens),
+                func.sum(LLMUsage.completion_tokens),
+                func.sum(LLMUsage.cached_tokens),
+                func.sum(LLMUsage.total_tokens),
+            )
+            if game_id:
+                query = query.filter(LLMUsage.game_id == game_id)
+            if key_id:
+                query = query.filter(LLMUsage.key_id == key_id)
+            rows = query.group_by(LLMUsage.game_id, LLMUsage.color, LLMUsage.purpose, LLMUsage.model).all()
+        finally:
+            db.close()
+
+        breakdown: List[Dict] = []
+        totals = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "total_tokens": 0}
+        for row_game, color, purpose, model, calls, prompt, completion, cached, total in rows:
+            entry = {
+                "game_id": row_game,
+                "color": color,
+                "purpose": purpose,
+                "model": model,
+                "calls": calls,
+                "prompt_tokens": prompt or 0,
+                "completion_tokens": completion or 0,
+                "cached_tokens": cached or 0,
+                "total_tokens": total or 0,
+            }
+            breakdown.append(entry)
+            for field in totals:
+                totals[field] += entry[field]
+
+        result = {"totals": totals, "breakdown": breakdown, "budgets": {
+            "game_token_budget": self.game_budget or None,
+            "key_token_budget_per_day": self.key_budget or None,
+        }}
+        if game_id and self.game_budget:
+            with self._lock:
+                result["budgets"]["game_remaining"] = self.game_budget - self._game_totals.get(game_id, 0)
+        return result
+
+
+usage_ledger = UsageLedger()
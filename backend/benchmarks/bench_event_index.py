@@ -0,0 +1,55 @@
+"""
+Event index benchmark
+Compares per-turn prompt size of the full timeline against the relevance-ranked excerpt,
+and checks the excerpt still contains the events a time-specific question needs
+
+Run from the backend directory:
+    python -m benchmarks.bench_event_index [num_periods ...]
+"""
+
+import random
+import sys
+import time
+
+from app.event_index import EventIndex, estimate_tokens
+from app.llm_service import OpenAIService
+from benchmarks.bench_snapshot import make_game_data
+
+QUESTIONS = 200
+
+
+def run(num_periods: int):
+    game_data = make_game_data(num_periods)
+    events = game_data["player_events"]["Player1"]
+    murder_time = game_data["impostor_data"]["murder_event"]["time"]
+    format_events = OpenAIService._format_events
+
+    started = time.perf_counter()
+    index = EventIndex(events)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    full_tokens = estimate_tokens(format_events(None, events))
+    rng = random.Random(3)
+    times = sorted({e["time"] for e in events})
+    hits = 0
+    excerpt_tokens = 0
+    select_ms = 0.0
+    for _ in range(QUESTIONS):
+        t = rng.choice(times)
+        started = time.perf_counter()
+        selected = index.select(f"Where were you at time {t} and who did you see?", murder_time)
+        select_ms += (time.perf_counter() - started) * 1000
+        excerpt_tokens += estimate_tokens(format_events(None, selected))
+        needed = [e for e in events if e["time"] == t]
+        hits += all(e in selected for e in needed)
+
+    print(f"periods={num_periods} events={len(events)}  index build {build_ms:.2f} ms")
+    print(f"  full timeline  ~{full_tokens:>7} tokens per turn")
+    print(f"  ranked excerpt ~{excerpt_tokens // QUESTIONS:>7} tokens per turn  "
+          f"select {select_ms / QUESTIONS:.3f} ms  asked-time recall {hits / QUESTIONS:.0%}")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000]
+    for n in sizes:
+        run(n)
@@ -0,0 +1,89 @@
+"""
+Player-count scaling benchmark
+Runs game generation against a stub OpenAI client (no network) for 4-15 players and
+reports init time, peak memory and the largest event-generation prompt
+
+Run from the backend directory:
+    python -m benchmarks.bench_scaling [num_periods]
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+# Every stub call is recorded in the usage ledger; keep those rows out of backend/database.db
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+import openai
+
+from app.database import init_db
+from app.event_generator import SHIP_LOCATIONS, MIN_PLAYERS, MAX_PLAYERS, max_impostors, generate_game_data
+
+prompt_sizes = []
+
+
+class StubCompletions:
+    def __init__(self):
+        self.rng = random.Random(11)
+
+    def create(self, model, messages, temperature, max_tokens):
+        prompt = messages[-1]["content"]
+        roster = re.search(r"from: (.+?)\.\n", prompt) or re.search(r"players: (.+?)\.\n", prompt)
+        players = roster.group(1).split(", ")
+        if prompt.startswith("Based on the following event history"):
+            count = int(re.search(r"select (\d+) player", prompt).group(1))
+            content = json.dumps({"impostors": players[:count], "murder_events": []})
+        else:
+            prompt_sizes.append(len(prompt))
+            time_index = int(re.search(r"time period (\d+)", prompt).group(1))
+            low, high = map(int, re.search(r"have (\d+)-(\d+) events", prompt).groups())
+            events = []
+            for i in range(self.rng.randint(low, high)):
+                involved = self.rng.sample(players, self.rng.randint(1, 3))
+                events.append({
+                    "event_id": time_index * 100 + i,
+                    "description": f"{' and '.join(involved)} worked in {self.rng.choice(SHIP_LOCATIONS)}.",
+                    "players": involved,
+                })
+            content = json.dumps({"time": time_index, "events": events})
+        # Rough counts (four characters per token) so the usage ledger sees a real-looking call
+        prompt_tokens = sum(len(message["content"]) for message in messages) // 4
+        usage = SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=len(content) // 4,
+            total_tokens=prompt_tokens + len(content) // 4,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=0),
+        )
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage)
+
+
+class StubOpenAI:
+    def __init__(self, api_key):
+        self.chat = SimpleNamespace(completions=StubCompletions())
+
+
+def run(num_periods: int):
+    openai.OpenAI = StubOpenAI
+    init_db()
+    print(f"periods={num_periods}")
+    print(f"  {'players':>7} {'impostors':>9} {'init ms':>9} {'peak KiB':>9} {'max prompt chars':>17}")
+    for num_players in range(MIN_PLAYERS, MAX_PLAYERS + 1):
+        prompt_sizes.clear()
+        tracemalloc.start()
+        started = time.perf_counter()
+        generate_game_data("stub", num_periods, num_players=num_players, num_impostors=max_impostors(num_players))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {num_players:>7} {max_impostors(num_players):>9} {elapsed_ms:>9.1f} "
+              f"{peak / 1024:>9.0f} {max(prompt_sizes):>17}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,115 @@
+"""
+Snapshot codec benchmark
+Compares size and load time of the binary snapshot format against JSON
+
+Run from the backend directory:
+    python -m benchmarks.bench_snapshot [num_periods]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from app.event_generator import PLAYER_COLORS, SHIP_LOCATIONS
+from app.snapshot import encode_snapshot, decode_snapshot, open_snapshot, write_snapshot
+
+ACTIONS = [
+    "finished wiring in {loc} and headed out",
+    "was seen emptying the garbage chute near {loc}",
+    "crossed paths with the others in {loc} while fixing lights",
+    "scanned in {loc} while someone watched from the doorway",
+    "waited alone in {loc} for the reactor task to finish",
+]
+
+
+def make_game_data(num_periods: int, seed: int = 7) -> dict:
+    """Build a synthetic game shaped like generate_game_data() output"""
+    rng = random.Random(seed)
+    players = list(PLAYER_COLORS.keys())
+    all_events = []
+    event_id = 1
+    for t in range(num_periods):
+        events = []
+        for _ in range(rng.randint(2, 4)):
+            involved = rng.sample(players, rng.randint(1, 3))
+            action = rng.choice(ACTIONS).format(loc=rng.choice(SHIP_LOCATIONS))
+            events.append({
+                "event_id": event_id,
+                "description": f"{' and '.join(involved)} {action}.",
+                "players": involved,
+            })
+            event_id += 1
+        all_events.append({"time": t, "events": events})
+
+    player_events = {name: [] for name in players}
+    for period in all_events:
+        for event in period["events"]:
+            for name in event["players"]:
+                player_events[name].append({"time": period["time"], **event})
+
+    return {
+        "all_events": all_events,
+        "player_events": player_events,
+        "impostor_data": {
+            "impostor": "Player2",
+            "murder_event": {
+                "time": num_periods // 2,
+                "location": "Electrical",
+                "victim": "Crewmate5",
+                "description": "Player2 eliminated Crewmate5 in Electrical.",
+                "witnesses": ["Player4"],
+            },
+        },
+        "impostor_color": "yellow",
+    }
+
+
+def timed(fn, repeat: int = 50) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(num_periods: int):
+    game_data = make_game_data(num_periods)
+    json_bytes = json.dumps(game_data).encode("utf-8")
+    snapshot = encode_snapshot(game_data)
+    assert decode_snapshot(snapshot) == game_data
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "game.json")
+        snap_path = os.path.join(tmp, "game.snap")
+        with open(json_path, "wb") as f:
+            f.write(json_bytes)
+        write_snapshot(snap_path, game_data)
+
+        def load_json():
+            with open(json_path, "rb") as f:
+                json.load(f)
+
+        def open_mmap():
+            open_snapshot(snap_path).release()
+
+        def load_mmap_full():
+            view = open_snapshot(snap_path)
+            view.to_game_data()
+            view.release()
+
+        json_ms = timed(load_json)
+        mmap_ms = timed(open_mmap)
+        full_ms = timed(load_mmap_full)
+
+    print(f"periods={num_periods}")
+    print(f"  json      {len(json_bytes):>9} bytes  load {json_ms:8.3f} ms")
+    print(f"  snapshot  {len(snapshot):>9} bytes  open {mmap_ms:8.3f} ms  "
+          f"full decode {full_ms:8.3f} ms  ({len(snapshot) / len(json_bytes):.1%} of json)")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000]
+    for n in sizes:
+        run(n)
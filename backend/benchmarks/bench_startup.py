@@ -0,0 +1,48 @@
+"""
+Cold-start benchmark
+Measures how long a fresh interpreter takes to import the backend app
+
+Run from the backend directory:
+    python -m benchmarks.bench_startup [runs]
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+
+TOP_MODULES = 10
+
+
+def import_once() -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import app.main"], check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def slowest_imports() -> list:
+    """Parse -X importtime output into (cumulative_us, module) pairs"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        check=True, capture_output=True, text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, module = [part.strip() for part in line.split(":", 1)[1].split("|")]
+        rows.append((int(cumulative_us), module))
+    return sorted(rows, reverse=True)[:TOP_MODULES]
+
+
+def run(runs: int):
+    timings = [import_once() for _ in range(runs)]
+    print(f"import app.main over {runs} runs (interpreter start included)")
+    print(f"  median {statistics.median(timings):8.1f} ms  min {min(timings):8.1f} ms  max {max(timings):8.1f} ms")
+    print("slowest imports (cumulative):")
+    for cumulative_us, module in slowest_imports():
+        print(f"  {cumulative_us / 1000:8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
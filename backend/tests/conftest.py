@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests import the backend as the "app" package, the same way uvicorn does
+sys.path.insert(0, str(Path(__file__).parent.parent))
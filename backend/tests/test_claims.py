@@ -0,0 +1,72 @@
+import pytest
+
+from app.claims import ClaimIndex, extract_claims
+from app.timeline_qa import PlayerTimeline
+
+ROSTER = {"Player1", "Player2", "Player3", "Player4"}
+
+
+def slots(claims):
+    return [(c["subject"], c["time"], c.get("location"), c.get("with")) for c in claims]
+
+
+@pytest.mark.parametrize("reply, expected", [
+    ("At time 3 I was in Admin.", [("Player1", 3, "Admin", None)]),
+    ("I was with Player2 at time 7.", [("Player1", 7, None, "Player2")]),
+    ("I was with blue in Admin at time 3.", [("Player1", 3, "Admin", None), ("Player1", 3, None, "Player3")]),
+    ("I saw blue in Admin at time 3.", [("Player3", 3, "Admin", None), ("Player1", 3, None, "Player3")]),
+    ("Green was in Reactor at time 5.", [("Player4", 5, "Reactor", None)]),
+    ("My view is green was in Reactor at time 5.", [("Player4", 5, "Reactor", None)]),
+    ("At time 3 I ended up in Electrical with yellow.", [("Player1", 3, "Electrical", None), ("Player1", 3, None, "Player2")]),
+    ("At time 2 and time 4 I was in O2.", [("Player1", 2, "O2", None), ("Player1", 4, "O2", None)]),
+])
+def test_extracts_claims(reply, expected):
+    assert slots(extract_claims("Player1", reply, ROSTER)) == expected
+
+
+@pytest.mark.parametrize("reply", [
+    "My guess is green was in Reactor at time 5.",
+    "I think I was in Admin at time 3.",
+    "Probably Storage at time 2, I was in there.",
+    "I was not in Admin at time 8.",
+    "I walked from Admin to Electrical at time 3.",
+    "I was in Admin.",
+    "Orange was in Admin at time 3.",
+])
+def test_skips_hedged_ambiguous_or_untimed(reply):
+    assert extract_claims("Player1", reply, ROSTER) == []
+
+
+def make_index(events=None):
+    timelines = {name: PlayerTimeline(name, (events or {}).get(name, []), sorted(ROSTER)) for name in ROSTER}
+    return ClaimIndex(sorted(ROSTER), timelines.__getitem__)
+
+
+def test_multi_location_event_is_not_a_timeline_contradiction():
+    index = make_index({"Player1": [
+        {"time": 3, "description": "Player1 walked from Admin to Electrical.", "players": ["Player1", "Player2"]},
+    ]})
+    assert index.add_reply("Player1", "At time 3 I ended up in Electrical with yellow.") == []
+
+
+def test_timeline_contradiction():
+    index = make_index({"Player1": [{"time": 3, "description": "Player1 fixed wires in Admin.", "players": ["Player1"]}]})
+    found = index.add_reply("Player1", "At time 3 I was in Reactor.")
+    assert [(c["kind"], c["recorded"]) for c in found] == [("timeline", ["Admin"])]
+
+
+def test_cross_contradictions():
+    index = make_index()
+    index.add_reply("Player1", "I was with yellow at time 7. At time 7 I was in Weapons.")
+    found = index.add_reply("Player2", "At time 7 I was in Navigation.")
+    assert [(c["kind"], c["suspects"]) for c in found] == [("cross", ["red", "yellow"])]
+
+    # Red is placed in two rooms, and away from yellow whom red claimed to be with
+    found = index.add_reply("Player3", "Red was in Admin at time 7.")
+    assert [c["detail"] for c in found] == [
+        "red placed in both Weapons and Admin at time 7",
+        "red and yellow were together at time 7, but are placed in Admin and Navigation",
+    ]
+    # Repeating a claim adds nothing new
+    assert index.add_reply("Player3", "Red was in Admin at time 7.") == []
+    assert index.report("green")["contradictions"] == []
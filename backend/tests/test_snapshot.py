@@ -0,0 +1,72 @@
+import copy
+
+import pytest
+
+from app.event_generator import build_player_events
+from app.snapshot import decode_snapshot, encode_snapshot, open_snapshot, write_snapshot
+from benchmarks.bench_snapshot import make_game_data
+
+
+def game(all_events):
+    roster = ["Player1", "Player2", "Player3", "Player4"]
+    return {
+        "all_events": all_events,
+        "player_events": build_player_events(all_events, roster),
+        "impostor_data": {"impostor": "Player2", "murder_event": {"time": 2, "location": "Admin"}},
+        "impostor_color": "yellow",
+        "impostor_colors": ["yellow"],
+        "players": {"Player1": "red", "Player2": "yellow", "Player3": "blue", "Player4": "green"},
+    }
+
+
+def test_round_trip_generated_game():
+    data = make_game_data(40)
+    assert decode_snapshot(encode_snapshot(data)) == data
+
+
+def test_round_trip_keeps_values_the_columns_cannot_hold():
+    data = game([
+        {"time": 0, "events": [
+            {"event_id": 1, "description": "Player1 fixed wires in Electrical.", "players": ["Player1"]},
+            {"event_id": "2b", "description": "Player2 and Player3 met in Admin.", "players": ["Player2", "Player3"],
+             "location": "Admin", "mood": "tense"},
+            {"event_id": None, "description": None, "players": None},
+            {"description": "Player4 ran to O2."},
+        ]},
+        {"time": "1", "events": [
+            {"event_id": -5, "description": "Player4 idled.", "players": ["Player4", 7]},
+            {"event_id": 2 ** 40, "description": "Nothing happened.", "players": []},
+        ], "note": "period extra"},
+        {"events": []},
+    ])
+    original = copy.deepcopy(data)
+    assert decode_snapshot(encode_snapshot(data)) == original
+
+
+def test_round_trip_keeps_player_events_that_are_not_derived():
+    data = game([{"time": 0, "events": [
+        {"event_id": 1, "description": "Player1 fixed wires.", "players": ["Player1"]},
+    ]}])
+    data["player_events"]["Player3"] = [{"time": 9, "description": "hand-written"}]
+    assert decode_snapshot(encode_snapshot(data)) == data
+
+
+def test_missing_top_level_keys_stay_missing():
+    data = {"impostor_color": "red"}
+    assert decode_snapshot(encode_snapshot(data)) == data
+
+
+def test_rejects_non_object_events():
+    with pytest.raises(ValueError):
+        encode_snapshot({"all_events": [{"time": 0, "events": ["not an event"]}], "player_events": {}})
+
+
+def test_memory_mapped_file_round_trip(tmp_path):
+    data = make_game_data(10)
+    path = tmp_path / "game.snap"
+    write_snapshot(str(path), data)
+    view = open_snapshot(str(path))
+    try:
+        assert view.to_game_data() == data
+    finally:
+        view.release()
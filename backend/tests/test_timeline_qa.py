@@ -0,0 +1,72 @@
+import pytest
+
+from app.timeline_qa import PlayerTimeline, answer_locally, parse_question
+
+ROSTER = {"Player1", "Player2", "Player3", "Player4"}
+
+EVENTS = [
+    {"time": 1, "description": "Player1 and Player2 fixed wiring in Cafeteria.", "players": ["Player1", "Player2"]},
+    {"time": 3, "description": "Player1 walked from Admin to Electrical.", "players": ["Player1"]},
+    {"time": 4, "description": "Player1 and Player3 refilled O2.", "players": ["Player1", "Player3"]},
+]
+
+
+@pytest.fixture
+def timeline():
+    return PlayerTimeline("Player1", EVENTS, sorted(ROSTER))
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("Where were you at time 3?", {"intent": "where", "time": 3}),
+    ("Who were you with at time 4?", {"intent": "who_with", "time": 4}),
+    ("What were you doing at time 1?", {"intent": "what_doing", "time": 1}),
+    ("Were you in Electrical at time 3?", {"intent": "at_location_at_time", "location": "Electrical", "time": 3}),
+    ("Were you in O2 at time 4?", {"intent": "at_location_at_time", "location": "O2", "time": 4}),
+    ("When were you in Admin?", {"intent": "when_at_location", "location": "Admin"}),
+    ("Did you see blue at time 4?", {"intent": "saw_player", "player": "Player3", "time": 4}),
+    ("Did you see Player 2?", {"intent": "saw_player", "player": "Player2", "time": None}),
+])
+def test_parses_plain_lookups(question, expected):
+    assert parse_question(question, "Player1", ROSTER) == expected
+
+
+@pytest.mark.parametrize("question", [
+    "Where did you go after time 3?",
+    "Where were you before time 4?",
+    "Where were you between time 2 and 4?",
+    "What did you do until time 5?",
+    "What did you do at time 3 and 4?",
+    "What did you do at time 3 and time 4?",
+    "Where were you in the last 2 rounds at time 3?",
+    "Were you in Admin or Electrical at time 3?",
+    "Did you see blue and green at time 4?",
+    "Who do you think killed red at time 5?",
+    "Why were you in Admin at time 3?",
+    "Where were you at time 3 and who did you see?",
+    "Where were you at time 3? Be honest, did you do it?",
+    "Did you see blue at time 3 in Reactor?",
+    "Were you with blue in Admin at time 3?",
+])
+def test_sends_everything_else_to_llm(question):
+    assert parse_question(question, "Player1", ROSTER) is None
+
+
+def test_ignores_colours_outside_roster():
+    assert parse_question("Did you see orange at time 1?", "Player1", ROSTER) is None
+
+
+def test_indexes_every_location_in_an_event(timeline):
+    assert timeline.locations_by_time[3] == ["Admin", "Electrical"]
+    assert answer_locally(timeline, "Were you in Electrical at time 3?") == "Yes, I was in Electrical at time 3."
+    assert answer_locally(timeline, "Were you in Admin at time 3?") == "Yes, I was in Admin at time 3."
+    assert answer_locally(timeline, "Where were you at time 3?") == "At time 3 I was in Admin and Electrical."
+
+
+def test_answers_from_timeline(timeline):
+    assert answer_locally(timeline, "Were you in Reactor at time 3?") == (
+        "No, at time 3 I was in Admin and Electrical, not Reactor."
+    )
+    assert answer_locally(timeline, "Who were you with at time 4?") == "At time 4 I was with Player3 (blue)."
+    assert answer_locally(timeline, "When were you in O2?") == "I was in O2 at time 4."
+    assert answer_locally(timeline, "Did you see yellow?") == "I was with Player2 (yellow) at time 1."
+    assert answer_locally(timeline, "Where were you before time 4?") is None
@@ -0,0 +1,33 @@
+import pytest
+
+from app.usage import FALLBACK_MODEL, BudgetExceeded, UsageLedger
+
+
+def ledger_with_spent(spent):
+    ledger = UsageLedger(game_budget=1000, key_budget=0)
+    ledger._game_totals["game"] = spent
+    return ledger
+
+
+def test_plan_tiers_for_chat():
+    assert ledger_with_spent(0).plan("sk-test", "game", "gpt-4.1", 500) == {
+        "model": "gpt-4.1", "max_tokens": 500, "history_limit": 10
+    }
+    assert ledger_with_spent(600).plan("sk-test", "game", "gpt-4.1", 500) == {
+        "model": "gpt-4.1", "max_tokens": 250, "history_limit": 4
+    }
+    assert ledger_with_spent(800).plan("sk-test", "game", "gpt-4.1", 500) == {
+        "model": FALLBACK_MODEL, "max_tokens": 125, "history_limit": 2
+    }
+
+
+def test_low_budget_keeps_json_output_whole():
+    for spent in (600, 800):
+        plan = ledger_with_spent(spent).plan("sk-test", "game", "gpt-4.1", 1500, shrink_output=False)
+        assert plan["max_tokens"] == 1500
+    assert ledger_with_spent(800).plan("sk-test", "game", "gpt-4.1", 1500, shrink_output=False)["model"] == FALLBACK_MODEL
+
+
+def test_exhausted_budget_raises():
+    with pytest.raises(BudgetExceeded):
+        ledger_with_spent(1000).plan("sk-test", "game", "gpt-4.1", 1500, shrink_output=False)
@@ -8,6 +8,19 @@ import ApiKeyInput from './components/ApiKeyInput';
 import { gameAPI } from './services/api';
 import './App.css';
 
+const STATUS_POLL_INTERVAL_MS = 1000;
+
+// Wait for the background generation job started by initGame to finish
+const waitForGame = async (gameId) => {
+  for (;;) {
+    const status = await gameAPI.getGameStatus(gameId);
+    if (status.status !== 'generating') {
+      return status;
+    }
+    await new Promise(resolve => setTimeout(resolve, STATUS_POLL_INTERVAL_MS));
+  }
+};
+
 function App() {
   // Game initialization state
   const [gamePhase, setGamePhase] = useState('api-key'); // 'api-key', 'loading', 'playing', 'selecting', 'result'
@@ -37,10 +50,11 @@ function App() {
     
     try {
       const response = await gameAPI.initGame(key);
+      const status = response.success ? await waitForGame(response.game_id) : null;
       
-      if (response.success) {
+      if (status && status.status === 'ready') {
         setGameId(response.game_id);
-        setActualImpostor(response.impostor_color);
+        setActualImpostor(status.impostor_color);
         setGamePhase('playing');
         // Reset game state
         setQuestionsLeft(30);
@@ -51,7 +65,7 @@ function App() {
           blue: [],
         });
       } else {
-        setInitError(response.message || 'Failed to initialize game');
+        setInitError(status?.message || response.message || 'Failed to initialize game');
         setGamePhase('api-key');
       }
     } catch (err) {
@@ -16,6 +16,12 @@ export const gameAPI = {
     return response.data;
   },
 
+  // Poll background game generation progress
+  getGameStatus: async (gameId) => {
+    const response = await api.get(`/game/${gameId}/status`);
+    return response.data;
+  },
+
   // Send a message to a specific player
   chatWithPlayer: async (gameId, color, message) => {
     const response = await api.post('/game/chat', {